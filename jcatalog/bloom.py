@@ -0,0 +1,160 @@
+# coding: utf-8
+'''
+Bloom filter of the ISSNs and title keys of a collection.
+
+The filter is built by the loaders and saved in data/bloom/, with the
+stamp of the collection: its number of documents and a digest of their
+issn_list and title. A lookup that is not in the filter is certainly not
+in the collection, so the query can be skipped. A filter saved with a
+different stamp is not used: a reload or an update of ISSNs or titles
+changes the digest, while the other updates (countries, indicators,
+links) keep the filter in use.
+'''
+import os
+import math
+import json
+import hashlib
+
+from accent_remover import title_key
+
+
+BLOOM_PATH = 'data/bloom/'
+
+# fields of the filter
+FIELDS = ['issn_list', 'title']
+
+
+class BloomFilter(object):
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+
+        # bits and hash functions for the error rate
+        self.m = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.k = max(1, int(round(self.m / float(capacity) * math.log(2))))
+        self.bits = bytearray((self.m + 7) // 8)
+
+    def positions(self, value):
+        digest = hashlib.md5(value.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.m for i in range(self.k)]
+
+    def add(self, value):
+        for p in self.positions(value):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self.positions(value))
+
+    def save(self, file_name, stamp):
+        with open(file_name, 'wb') as f:
+            f.write(json.dumps({'m': self.m, 'k': self.k, 'stamp': stamp}).encode('utf-8'))
+            f.write(b'\n')
+            f.write(self.bits)
+
+    @classmethod
+    def load(cls, file_name):
+        '''
+        Return (filter, stamp of the collection).
+        '''
+        with open(file_name, 'rb') as f:
+            header = json.loads(f.readline().decode('utf-8'))
+            bf = cls.__new__(cls)
+            bf.m = header['m']
+            bf.k = header['k']
+            bf.bits = bytearray(f.read())
+
+        # filters saved before the stamp are never up to date
+        return bf, header.get('stamp')
+
+
+def issn_key(issn):
+    return 'issn:' + issn
+
+
+def title_bloom_key(title):
+    return 'title:' + title_key(title)
+
+
+def file_name(dbcol):
+    return os.path.join(BLOOM_PATH, dbcol._class_name.lower() + '.bloom')
+
+
+def stamp(dbcol, fields=FIELDS):
+    '''
+    Number of documents and digest of the fields of a collection.
+    '''
+    digest = hashlib.md5()
+    count = 0
+
+    projection = dict([('_id', 0)] + [(f, 1) for f in fields])
+
+    for doc in dbcol._get_collection().find({}, projection).sort('_id', 1):
+        digest.update(json.dumps(
+            [doc.get(f) for f in fields], default=str).encode('utf-8'))
+        count += 1
+
+    return '%d:%s' % (count, digest.hexdigest())
+
+
+def build(dbcol, error_rate=0.001):
+    '''
+    Build and save the filter of issn_list and title of dbcol.
+    '''
+    current = stamp(dbcol)
+
+    keys = set()
+    for doc in dbcol._get_collection().find({}, {'issn_list': 1, 'title': 1}):
+        for issn in doc.get('issn_list') or []:
+            if isinstance(issn, str):
+                keys.add(issn_key(issn))
+        if isinstance(doc.get('title'), str):
+            keys.add(title_bloom_key(doc['title']))
+
+    bf = BloomFilter(len(keys), error_rate)
+    for key in keys:
+        bf.add(key)
+
+    if not os.path.exists(BLOOM_PATH):
+        os.makedirs(BLOOM_PATH)
+
+    bf.save(file_name(dbcol), current)
+
+    return bf
+
+
+def load(dbcol):
+    '''
+    Return the saved filter of dbcol, or None when there is no filter or
+    the collection changed since it was built.
+    '''
+    if not os.path.exists(file_name(dbcol)):
+        return None
+
+    bf, saved = BloomFilter.load(file_name(dbcol))
+
+    if saved != stamp(dbcol):
+        return None
+
+    return bf
+
+
+def maybe_issn(bf, issn):
+    # without filter every ISSN may be in the collection
+    return bf is None or not isinstance(issn, str) or issn_key(issn) in bf
+
+
+def maybe_title(bf, title):
+    return bf is None or not isinstance(title, str) or title_bloom_key(title) in bf
+
+
+def maybe_any(bf, issn_list, title):
+    '''
+    False when no ISSN and not the title are in the filter.
+    '''
+    if bf is None:
+        return True
+
+    return (any(maybe_issn(bf, i) for i in issn_list or []) or
+            (isinstance(title, str) and maybe_title(bf, title)))
@@ -0,0 +1,46 @@
+# coding: utf-8
+'''
+This script groups update operations and sends them to MongoDB as
+unordered bulk writes.
+'''
+from pymongo import UpdateOne
+
+
+class BulkWriter(object):
+
+    def __init__(self, collection, batch_size=1000):
+        # pymongo collection, e.g.: models.Scielo._get_collection()
+        self.collection = collection
+        self.batch_size = batch_size
+        self.ops = []
+        # number of operations by tag, e.g.: match stage
+        self.counts = {}
+        self.modified = 0
+
+    def add(self, op, tag=None):
+        self.ops.append(op)
+
+        if tag is not None:
+            self.counts[tag] = self.counts.get(tag, 0) + 1
+
+        if len(self.ops) >= self.batch_size:
+            self.flush()
+
+    def update(self, _id, update, tag=None):
+        self.add(UpdateOne({'_id': _id}, update), tag)
+
+    def set(self, _id, data, tag=None):
+        self.update(_id, {'$set': data}, tag)
+
+    def flush(self):
+        if self.ops:
+            result = self.collection.bulk_write(self.ops, ordered=False)
+            self.modified += result.modified_count
+            self.ops = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
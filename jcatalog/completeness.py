@@ -0,0 +1,24 @@
+# coding: utf-8
+'''
+Field completeness score of a journal document.
+
+The score is the number of non-empty fields of the document and is
+stored by the loaders as field_count. It is the tiebreak of the match
+when an ISSN is found in more than one document.
+
+field_count counts the fields of the source as loaded: the fields added
+later by the enrichments of other sheets (transform/enrichment.py) and
+by the match are left out, so documents of the same source are compared
+on the same footing whatever was added to them afterwards.
+'''
+
+
+# set by the models and the match, not by the source
+BOOKKEEPING = set(['_id', 'creation_date', 'updated_at', 'linked_at', 'field_count'])
+
+
+def field_count(rec):
+    return len([
+        k for k, v in rec.items()
+        if k not in BOOKKEEPING and not k.startswith('is_') and (v or v == 0)])
+
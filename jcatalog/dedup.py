@@ -0,0 +1,33 @@
+# coding: utf-8
+'''
+Streaming removal of duplicate records.
+
+Each record is reduced to the digest of its canonical form (sorted keys,
+values as JSON), so only 16 bytes by distinct record are kept and each
+record is compared once.
+'''
+import json
+import hashlib
+
+
+def row_hash(rec):
+    '''
+    Digest of the record, the same for records equal as dicts.
+    '''
+    canonical = json.dumps(rec, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(canonical.encode('utf-8')).digest()
+
+
+def dedup(records, key=row_hash):
+    '''
+    Yield the records of the iterable without the repeated ones, in order.
+    key = function of the record compared, e.g.: lambda r: r['issn']
+    '''
+    seen = set()
+
+    for rec in records:
+        h = key(rec)
+
+        if h not in seen:
+            seen.add(h)
+            yield rec
@@ -49,6 +49,8 @@ EM TESTE
 # from transform import cwts_country
 
 # from match import matches
+# from match import runner
+# from match import clusters
 
 # from reports import jcr_export_indicators
 # from reports import scopus_export_indicators
@@ -115,6 +117,8 @@ if __name__ == "__main__":
     # cwts_country.main()
 
     # matches.main()
+    # runner.main()
+    # clusters.main()
 
     # jcr_export_indicators
 
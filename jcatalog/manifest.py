@@ -0,0 +1,189 @@
+# coding: utf-8
+'''
+Manifest of the stages already run and of their inputs.
+
+For each stage (a load, a match, a report) the manifest keeps the
+content hash of its input files, the digests of the stages or
+collections it depends on, and its result. A stage whose inputs did not
+change since its last run is skipped, and so are the stages depending
+on it, because their dependencies keep the same digest.
+
+The hash of a file is computed again only when its size or modification
+time changed, so a refresh with nothing new only reads the manifest.
+
+The outputs of a stage (e.g. the stamp of the collection of a load) are
+recorded after its run and compared before the next one: a collection
+dropped or left half written since the last run makes the stage run
+again even with the same inputs.
+
+e.g.:
+    m = manifest.Manifest()
+    manifest.run('load:Scopus', load_scopus, files=['data/scopus/list.xlsx'], manifest=m)
+    manifest.run('report:jcatalog', jcatalog.main, deps=m.digests('Scopus'), manifest=m)
+'''
+import os
+import json
+import hashlib
+import logging
+import datetime
+
+import bloom
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH = 'data/manifest.json'
+
+
+def sha256(file_name):
+    h = hashlib.sha256()
+
+    with open(file_name, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+class Manifest(object):
+
+    def __init__(self, file_name=MANIFEST_PATH):
+        self.file_name = file_name
+
+        # {'files': {file: {size, mtime, hash}}, 'stages': {stage: {...}}}
+        self.data = {'files': {}, 'stages': {}}
+
+        if os.path.exists(file_name):
+            with open(file_name, encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def file_hash(self, file_name):
+        st = os.stat(file_name)
+        known = self.data['files'].get(file_name)
+
+        if known and known['size'] == st.st_size and known['mtime'] == st.st_mtime:
+            return known['hash']
+
+        h = sha256(file_name)
+        self.data['files'][file_name] = {
+            'size': st.st_size, 'mtime': st.st_mtime, 'hash': h}
+
+        return h
+
+    def inputs(self, files=(), deps=None):
+        return {
+            'files': {f: self.file_hash(f) for f in files},
+            'deps': dict(deps or {})}
+
+    def digest(self, stage):
+        '''
+        Digest of the inputs of the last run of the stage, or None.
+        '''
+        return self.data['stages'].get(stage, {}).get('digest')
+
+    def digests(self, *names, kinds=None):
+        '''
+        {stage: digest} of the recorded stages of the collections names,
+        e.g.: digests('Scielo') -> load:Scielo, update:Scielo:<file>...
+        kinds = kinds of stages, e.g.: ('load', 'update'), default all
+        '''
+        return {
+            stage: data['digest'] for stage, data in self.data['stages'].items()
+            if (kinds is None or stage.split(':')[0] in kinds) and
+            any(name in stage.split(':')[1:] for name in names)}
+
+    def changed(self, stage, files=(), deps=None):
+        '''
+        True when the stage never ran or one of its files or
+        dependencies changed since the last run.
+        '''
+        inputs = self.inputs(files, deps)
+        return self.digest(stage) != digest(inputs)
+
+    def record(self, stage, files=(), deps=None, result=None):
+        inputs = self.inputs(files, deps)
+
+        self.data['stages'][stage] = {
+            'files': inputs['files'],
+            'deps': inputs['deps'],
+            'digest': digest(inputs),
+            'result': result,
+            'date': datetime.datetime.now().isoformat()}
+
+        self.save()
+
+    def result(self, stage):
+        return self.data['stages'].get(stage, {}).get('result')
+
+    def save(self):
+        folder = os.path.dirname(self.file_name)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        tmp = self.file_name + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=1, sort_keys=True, default=str)
+        os.replace(tmp, self.file_name)
+
+
+def digest(inputs):
+    text = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def run(stage, function, files=(), deps=None, force=False, manifest=None,
+        outputs=None):
+    '''
+    Run function() unless the stage is unchanged, return its result or
+    the result of the last run.
+    files = input files of the stage
+    deps = {name: digest} of the stages or collections it depends on
+    force = True to run even when nothing changed
+    outputs = {name: function returning the digest of an output}, e.g.:
+    {'Scopus': lambda: bloom.stamp(models.Scopus)}
+    '''
+    m = manifest or Manifest()
+
+    def inputs():
+        result = dict(deps or {})
+        result.update(
+            ('output:' + name, output()) for name, output in (outputs or {}).items())
+        return result
+
+    if not force and not m.changed(stage, files, inputs()):
+        msg = u'%s: unchanged, skipped' % stage
+        logger.info(msg)
+        print(msg)
+        return m.result(stage)
+
+    result = function()
+    m.record(stage, files, inputs(), result)
+
+    return result
+
+
+def run_load(model, function, files=(), deps=None, force=False, manifest=None):
+    '''
+    run() of the load of the collection of model (stage load:<Model>),
+    with the stamp of the collection (bloom.stamp()) as output.
+    '''
+    name = model._class_name
+
+    return run(
+        'load:' + name, function, files, deps, force, manifest,
+        outputs={name: lambda: bloom.stamp(model)})
+
+
+def run_update(model, file_name, function, deps=None, force=False, manifest=None):
+    '''
+    run() of the update of the collection of model by file_name (stage
+    update:<Model>:<file_name>), run again after a load of the collection,
+    which replaces the fields added by the update.
+    '''
+    m = manifest or Manifest()
+
+    name = model._class_name
+
+    deps = dict(deps or {})
+    deps.update(m.digests(name, kinds=('load',)))
+
+    return run('update:%s:%s' % (name, file_name), function, [file_name], deps, force, m)
@@ -0,0 +1,155 @@
+# coding: utf-8
+'''
+This script performs the match between two journals Data Sets as
+MongoDB aggregations, the documents never leave the server.
+
+ISSN stages: $unwind issn_list, $lookup of DataSet2 by issn_list, choice
+of the candidate (unique ISSN, ISSN and title_key, highest field_count)
+and the first ISSN of issn_list with a candidate.
+Title and country stage: $lookup of DataSet2 by title_country_key.
+
+The links of each stage are written with $out in a temporary collection
+of the run, counted, and then $merge'd into DataSet1 as is_<col>, <col>_id,
+country_<col> and linked_at. Requires MongoDB 4.2 or later.
+
+Unlike match(), the country of the chosen candidate is always the one
+written and the most fields link is always written.
+'''
+import logging
+import datetime
+
+from bson import ObjectId
+
+logging.basicConfig(filename='logs/matches.info.txt', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def candidate():
+    # fields of a candidate used by the stages
+    return {
+        '_id': '$$t._id',
+        'title_key': '$$t.title_key',
+        'country': '$$t.country',
+        'nfields': {'$ifNull': ['$$t.field_count', {'$size': {'$objectToArray': '$$t'}}]}}
+
+
+def issn_pipeline(col, target_name):
+    return [
+        {'$match': {'is_' + col: 0}},
+        {'$project': {'issn_list': 1, 'title_key': 1}},
+        {'$unwind': {'path': '$issn_list', 'includeArrayIndex': 'pos'}},
+        {'$lookup': {
+            'from': target_name,
+            'localField': 'issn_list',
+            'foreignField': 'issn_list',
+            'as': 'targets'}},
+        {'$match': {'targets.0': {'$exists': True}}},
+        {'$project': {
+            'pos': 1,
+            'title_key': 1,
+            'targets': {'$map': {
+                'input': '$targets', 'as': 't', 'in': candidate()}}}},
+        {'$addFields': {
+            'title_hits': {'$filter': {
+                'input': '$targets',
+                'as': 't',
+                'cond': {'$and': [
+                    {'$eq': [{'$type': '$title_key'}, 'string']},
+                    {'$eq': ['$$t.title_key', '$title_key']}]}}}}},
+        {'$addFields': {
+            'link': {'$switch': {
+                'branches': [
+                    # 1.1) Only 1 document by ISSN
+                    {'case': {'$eq': [{'$size': '$targets'}, 1]},
+                     'then': {'stage': '1.1', 'target': {'$arrayElemAt': ['$targets', 0]}}},
+                    # 1.2) Only 1 document by ISSN and title
+                    {'case': {'$eq': [{'$size': '$title_hits'}, 1]},
+                     'then': {'stage': '1.2', 'target': {'$arrayElemAt': ['$title_hits', 0]}}},
+                    # 1.2.1) More than 1, the document with more fields
+                    {'case': {'$gt': [{'$size': '$title_hits'}, 1]},
+                     'then': {'stage': '1.2.1', 'target': {'$arrayElemAt': [
+                         '$targets',
+                         {'$indexOfArray': ['$targets.nfields', {'$max': '$targets.nfields'}]}]}}}],
+                'default': None}}}},
+        {'$match': {'link': {'$ne': None}}},
+        {'$sort': {'_id': 1, 'pos': 1}},
+        {'$group': {'_id': '$_id', 'link': {'$first': '$link'}}}]
+
+
+def title_country_pipeline(col, target_name):
+    return [
+        {'$match': {'is_' + col: 0, 'title_country_key': {'$type': 'string'}}},
+        {'$project': {'title_country_key': 1}},
+        {'$lookup': {
+            'from': target_name,
+            'localField': 'title_country_key',
+            'foreignField': 'title_country_key',
+            'as': 'targets'}},
+        {'$match': {'targets.0': {'$exists': True}}},
+        {'$project': {
+            'link': {
+                'stage': '2',
+                'target': {'$let': {
+                    'vars': {'t': {'$arrayElemAt': ['$targets', 0]}},
+                    'in': candidate()}}}}}]
+
+
+def run_stage(col1, pipeline, col, country, now):
+    '''
+    Run the pipeline into a temporary collection, merge the links into
+    DataSet1 and return the number of links by stage.
+    '''
+    # unique by run: two runs of the pair never share it
+    tmp = '%s_match_%s_%s' % (col1.name, col, ObjectId())
+
+    try:
+        col1.aggregate(pipeline + [{'$out': tmp}], allowDiskUse=True)
+
+        counts = {
+            d['_id']: d['n'] for d in col1.database[tmp].aggregate([
+                {'$group': {'_id': '$link.stage', 'n': {'$sum': 1}}}])}
+
+        col1.database[tmp].aggregate([
+            {'$project': {
+                'is_' + col: {'$literal': 1},
+                col + '_id': {'$toString': '$link.target._id'},
+                'country_' + col: '$link.target.country' if country == 1 else {'$literal': None},
+                'linked_at': {'$literal': now}}},
+            {'$merge': {
+                'into': col1.name,
+                'on': '_id',
+                'whenMatched': 'merge',
+                'whenNotMatched': 'discard'}}], allowDiskUse=True)
+    finally:
+        col1.database.drop_collection(tmp)
+
+    return counts
+
+
+def match(dbcol1, dbcol2, country=None):
+    '''
+    Return the number of updated documents by stage.
+    '''
+    db1 = dbcol1._class_name
+    db2 = dbcol2._class_name
+    col = db2.lower()
+
+    col1 = dbcol1._get_collection()
+    target_name = dbcol2._get_collection_name()
+
+    now = datetime.datetime.now()
+
+    summary = {}
+
+    # 1) ISSN stages
+    summary.update(run_stage(col1, issn_pipeline(col, target_name), col, country, now))
+
+    # 2) title and country, documents not linked by ISSN
+    summary.update(run_stage(col1, title_country_pipeline(col, target_name), col, country, now))
+
+    msg = '%s x %s aggregation : %s' % (db1, db2, ', '.join(
+        '%s: %d' % (k, summary[k]) for k in sorted(summary)))
+    logger.info(msg)
+    print(msg)
+
+    return summary
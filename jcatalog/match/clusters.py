@@ -0,0 +1,147 @@
+# coding: utf-8
+'''
+This script links the journals of all Data Sets in a single pass.
+
+Every document is joined to its ISSNs in a union-find structure, so the
+documents sharing any ISSN, directly or through other documents, end in
+the same cluster. The cluster_id of every document is written with one
+bulk update by collection, and the links of the pairs of match.runner
+are saved through the Links collection (match.links): a document whose
+cluster has no document of DataSet2 any more loses its link, and when
+the cluster has several documents of DataSet2 the one with more fields
+is the target, as in stage 1.2.1.
+'''
+import logging
+import datetime
+
+import models
+from match.union_find import UnionFind
+from match.runner import PAIRS
+from match import links
+from match import target_index
+from bulk_writer import BulkWriter
+
+logging.basicConfig(filename='logs/matches.info.txt', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def clusters(pairs=PAIRS, batch_size=1000):
+    '''
+    Return the number of documents updated by collection and the
+    summary of links.save() by pair.
+    '''
+    names = []
+    for db1, db2, country in pairs:
+        for name in (db1, db2):
+            if name not in names:
+                names.append(name)
+
+    uf = UnionFind()
+
+    # (name, id) -> {'country', 'nfields'}
+    docs = {}
+    # documents without ISSN with a cluster_id of a previous run
+    stale = {}
+
+    # Read issn_list of every Data Set
+    for name in names:
+        for doc in getattr(models, name)._get_collection().aggregate([
+                {'$project': {
+                    'issn_list': 1,
+                    'country': 1,
+                    'cluster_id': 1,
+                    'nfields': target_index.NFIELDS}}]):
+
+            node = (name, doc['_id'])
+            docs[node] = {'country': doc.get('country'), 'nfields': doc['nfields']}
+
+            uf.find(node)
+            for issn in doc.get('issn_list') or []:
+                uf.union(node, 'issn:' + issn)
+
+            if not doc.get('issn_list') and 'cluster_id' in doc:
+                stale.setdefault(name, []).append(doc['_id'])
+
+    # DataSet1 -> [(DataSet2, country)]
+    targets = {}
+    for db1, db2, country in pairs:
+        targets.setdefault(db1, []).append((db2, country))
+
+    # (DataSet1, DataSet2) -> {source_id: link}
+    new = {(db1, db2): {} for db1, db2, country in pairs}
+
+    writers = {
+        name: BulkWriter(getattr(models, name)._get_collection(), batch_size)
+        for name in names}
+
+    now = datetime.datetime.now()
+
+    for members in uf.components().values():
+
+        issns = sorted(m[5:] for m in members if isinstance(m, str))
+
+        # documents without ISSN are left out
+        if not issns:
+            continue
+
+        cluster_id = issns[0]
+
+        # name -> [ids], in the collection natural order
+        group = {}
+        for m in members:
+            if isinstance(m, tuple):
+                group.setdefault(m[0], []).append(m[1])
+
+        for name, ids in group.items():
+
+            for db2, country in targets.get(name, []):
+                if db2 not in group:
+                    continue
+
+                # the document with more fields, the first one on a tie
+                target = max(group[db2], key=lambda i: docs[(db2, i)]['nfields'])
+
+                for _id in ids:
+                    new[(name, db2)][_id] = {
+                        'target_id': str(target),
+                        'stage': 'cluster',
+                        'country': target_index.country_value(
+                            docs[(db2, target)], country, '1.1')}
+
+            for _id in ids:
+                writers[name].set(
+                    _id, {'cluster_id': cluster_id, 'linked_at': now}, tag=name)
+
+    result = {}
+    for name, writer in writers.items():
+        for _id in stale.get(name, []):
+            writer.update(_id, {'$unset': {'cluster_id': ''}})
+
+        writer.flush()
+        result[name] = writer.counts.get(name, 0)
+
+        msg = 'clusters : %s : %d documents' % (name, result[name])
+        logger.info(msg)
+        print(msg)
+
+    # links of the pairs, the missing ones are removed
+    for db1, db2, country in pairs:
+        summary = links.save(
+            getattr(models, db1), getattr(models, db2),
+            links.load(db1, db2), new[(db1, db2)], batch_size)
+        result[(db1, db2)] = summary
+
+        msg = 'clusters : %s x %s : %s' % (db1, db2, ', '.join(
+            '%s: %d' % (k, summary[k]) for k in sorted(summary)))
+        logger.info(msg)
+        print(msg)
+
+    return result
+
+
+def main():
+    clusters()
+
+
+if __name__ == "__main__":
+    main()
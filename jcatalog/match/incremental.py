@@ -0,0 +1,203 @@
+# coding: utf-8
+'''
+This script matches again only the documents changed since the last
+match of a pair (DataSet1, DataSet2).
+
+The start of each run is recorded as the watermark of the pair in the
+Matchwatermark collection. In the next run a document of DataSet1 is
+evaluated again when:
+    - it was created or updated after the watermark;
+    - it shares an ISSN or a title_country with a document of DataSet2
+      created or updated after the watermark;
+    - it is linked to a changed or deleted document of DataSet2.
+The links written by the matches are stamped with linked_at, so they
+are not changes of the documents (match.links).
+Links to DataSet2 documents that are no longer found are removed from
+the Links collection and their fields reset (match.links).
+
+A reload keeps the _id and the creation_date of the journals found again
+by their keys, and updated_at when their ISSNs, title and country did not
+change (staging), so it is not a change of every document. When more
+than FULL_RATIO of the documents of a Data Set changed anyway, the pair
+is matched again in full instead of with queries listing most of the
+collection.
+'''
+import logging
+import datetime
+
+import models
+from match import matches
+from match import target_index
+from accent_remover import title_key
+from match import links
+import bloom
+
+logging.basicConfig(filename='logs/matches.info.txt', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# largest ratio of changed documents matched incrementally
+FULL_RATIO = 0.5
+
+
+def changed_since(watermark):
+    # raw filter of the documents created or updated after the watermark
+    return {'$or': [
+        {'creation_date': {'$gt': watermark}},
+        {'updated_at': {'$gt': watermark}}]}
+
+
+def rematch(dbcol1, dbcol2, watermark, target_count, country=None, batch_size=1000,
+            fuzzy=None):
+
+    db1 = dbcol1._class_name
+    db2 = dbcol2._class_name
+    col = db2.lower()
+
+    col1 = dbcol1._get_collection()
+    col2 = dbcol2._get_collection()
+
+    # DataSet2 documents changed since the watermark
+    ids = set()
+    issns = set()
+    keys = set()
+    for d in col2.find(
+            changed_since(watermark),
+            {'issn_list': 1, 'title_country': 1}):
+        ids.add(str(d['_id']))
+        issns.update(d.get('issn_list') or [])
+        if isinstance(d.get('title_country'), str):
+            keys.add(title_key(d['title_country']))
+
+    query = changed_since(watermark)
+    if issns:
+        query['$or'].append({'issn_list': {'$in': list(issns)}})
+    if keys:
+        query['$or'].append({'title_country_key': {'$in': list(keys)}})
+    if ids:
+        query['$or'].append({col + '_id': {'$in': list(ids)}})
+
+    edges = links.load(db1, db2)
+
+    # DataSet2 documents deleted since the watermark: look for links
+    # to documents that are no longer found
+    if dbcol2.objects(creation_date__lte=watermark).count() < target_count:
+        existing = set(str(d['_id']) for d in col2.find({}, {'_id': 1}))
+        orphans = [
+            source_id for source_id, link in edges.items()
+            if link['target_id'] not in existing]
+        if orphans:
+            query['$or'].append({'_id': {'$in': orphans}})
+
+    docs = list(col1.find(query, {'issn_list': 1, 'title': 1, 'title_country': 1}))
+
+    # DataSet2 candidates of the changed documents only, ISSNs not in
+    # the filter of DataSet2 are left out of the query
+    bf = bloom.load(dbcol2)
+    s_issns = set()
+    s_keys = set()
+    for doc in docs:
+        s_issns.update(i for i in doc.get('issn_list') or [] if bloom.maybe_issn(bf, i))
+        if isinstance(doc.get('title_country'), str):
+            s_keys.add(title_key(doc['title_country']))
+
+    if fuzzy is None:
+        index = target_index.TargetIndex.from_collection(dbcol2, {'$or': [
+            {'issn_list': {'$in': list(s_issns)}},
+            {'title_country_key': {'$in': list(s_keys)}}]})
+    else:
+        # a similar title may be any title of DataSet2
+        index = target_index.TargetIndex.from_collection(dbcol2)
+        index.build_fuzzy()
+
+    # links of the evaluated documents
+    old = {doc['_id']: edges[doc['_id']] for doc in docs if doc['_id'] in edges}
+
+    new = {}
+
+    not_found = 0
+
+    for doc in docs:
+
+        link = target_index.resolve(
+            index,
+            doc.get('issn_list'),
+            title=doc.get('title'),
+            title_country=doc.get('title_country'),
+            country=country,
+            fuzzy=fuzzy)
+
+        # the similar title stage was not run: its link is kept
+        if link is None and fuzzy is None and \
+                old.get(doc['_id'], {}).get('stage') == '3':
+            new[doc['_id']] = old[doc['_id']]
+            continue
+
+        if link is None:
+            if doc['_id'] in old:
+                msg = '%s : %s : link to %s %s retracted' % (
+                    db1, doc.get('issn_list'), db2, old[doc['_id']]['target_id'])
+                logger.info(msg)
+                print(msg)
+            else:
+                not_found += 1
+            continue
+
+        if link['save']:
+            new[doc['_id']] = link
+        elif doc['_id'] in old:
+            new[doc['_id']] = old[doc['_id']]
+
+    summary = links.save(dbcol1, dbcol2, old, new, batch_size)
+    summary['evaluated'] = len(docs)
+    summary['not found'] = not_found
+
+    return summary
+
+
+def mostly_changed(dbcol1, dbcol2, watermark):
+    '''
+    True when more than FULL_RATIO of the documents of one of the Data
+    Sets changed since the watermark.
+    '''
+    for dbcol in (dbcol1, dbcol2):
+        col = dbcol._get_collection()
+        total = col.count_documents({})
+        if total and col.count_documents(changed_since(watermark)) > total * FULL_RATIO:
+            return True
+
+    return False
+
+
+def match_incremental(dbcol1, dbcol2, country=None, batch_size=1000, fuzzy=None):
+    '''
+    match(dbcol1, dbcol2, country) restricted to the changes since the
+    watermark of the pair, the first run of a pair is a full match.
+    fuzzy = similarity threshold of the similar title stage, as match()
+    '''
+    db1 = dbcol1._class_name
+    db2 = dbcol2._class_name
+
+    start = datetime.datetime.now()
+    target_count = dbcol2.objects().count()
+
+    wm = models.Matchwatermark.objects(source=db1, target=db2).first()
+
+    if wm is None or wm.watermark is None or mostly_changed(dbcol1, dbcol2, wm.watermark):
+        summary = matches.match(dbcol1, dbcol2, country, batch_size, fuzzy=fuzzy)
+        wm = wm or models.Matchwatermark(source=db1, target=db2)
+    else:
+        summary = rematch(
+            dbcol1, dbcol2, wm.watermark, wm.target_count, country, batch_size,
+            fuzzy=fuzzy)
+
+    wm.watermark = start
+    wm.target_count = target_count
+    wm.updated_at = datetime.datetime.now()
+    wm.save()
+
+    msg = '%s x %s incremental : %s' % (db1, db2, ', '.join(
+        '%s: %d' % (k, summary[k]) for k in sorted(summary)))
+    logger.info(msg)
+    print(msg)
+
+    return summary
@@ -0,0 +1,233 @@
+# coding: utf-8
+'''
+This script keeps the links found by the match of two journals Data Sets
+in the Links collection, one small document by link:
+(source, source_id, target, target_id, stage, score, country).
+
+The is_<col>, <col>_id, country_<col> and score_<col> fields of DataSet1
+are materialized from the links, and only for the links that changed,
+so running a pair again rewrites only the changed links. They are
+stamped with linked_at, not updated_at, which is left to the changes of
+the source data (see match.incremental). The links of a
+pair can be dropped, and their fields reset, with drop(). diff() writes
+the changes of a run as JSON Lines instead of saving them, comparing the
+targets by their ISSNs or title_country_key instead of their _id, so a
+run against a reloaded DataSet2 shows only the links that really changed.
+'''
+import logging
+import datetime
+import json
+
+from bson import ObjectId
+from pymongo import UpdateOne, DeleteOne
+
+import models
+from bulk_writer import BulkWriter
+
+logging.basicConfig(filename='logs/matches.info.txt', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def edge(link):
+    # fields of a link compared between runs
+    return {
+        'target_id': link['target_id'],
+        'stage': link['stage'],
+        'score': link.get('score'),
+        'country': link.get('country')}
+
+
+def load(db1, db2):
+    '''
+    Return {source_id: link} of the pair.
+    '''
+    return {
+        d['source_id']: edge(d)
+        for d in models.Links._get_collection().find(
+            {'source': db1, 'target': db2},
+            {'source_id': 1, 'target_id': 1, 'stage': 1, 'score': 1, 'country': 1})}
+
+
+def link_fields(col, link, now):
+    data = {
+        'is_' + col: 1,
+        col + '_id': link['target_id'],
+        'linked_at': now,
+        'country_' + col: link.get('country')}
+
+    if link.get('score') is not None:
+        data['score_' + col] = link['score']
+
+    return data
+
+
+def unlink_fields(col, now):
+    return {
+        '$set': {'is_' + col: 0, 'linked_at': now},
+        '$unset': {col + '_id': '', 'country_' + col: '', 'score_' + col: ''}}
+
+
+def changes(old, new):
+    '''
+    Yield (change, source_id, old link, new link) of the links that are
+    'added', 'changed' or 'removed' from old to new.
+    '''
+    for source_id, link in new.items():
+        if source_id not in old:
+            yield 'added', source_id, None, edge(link)
+        elif old[source_id] != edge(link):
+            yield 'changed', source_id, old[source_id], edge(link)
+
+    for source_id in old:
+        if source_id not in new:
+            yield 'removed', source_id, old[source_id], None
+
+
+def save(dbcol1, dbcol2, old, new, batch_size=1000):
+    '''
+    old = {source_id: link} of the evaluated documents before the run
+    new = {source_id: link} found in the run
+    Write the changed links and their fields in DataSet1, return the
+    number of written links by stage, 'removed' and 'unchanged'.
+    '''
+    db1 = dbcol1._class_name
+    db2 = dbcol2._class_name
+    col = db2.lower()
+
+    now = datetime.datetime.now()
+
+    with BulkWriter(models.Links._get_collection(), batch_size) as edges, \
+            BulkWriter(dbcol1._get_collection(), batch_size) as fields:
+
+        for change, source_id, old_link, link in changes(old, new):
+
+            if change == 'removed':
+                edges.add(DeleteOne(
+                    {'source': db1, 'target': db2, 'source_id': source_id}), tag='removed')
+
+                fields.update(source_id, unlink_fields(col, now))
+                continue
+
+            data = dict(link)
+            data['updated_at'] = now
+
+            edges.add(UpdateOne(
+                {'source': db1, 'target': db2, 'source_id': source_id},
+                {'$set': data, '$setOnInsert': {'creation_date': now}},
+                upsert=True), tag=link['stage'])
+
+            fields.set(source_id, link_fields(col, link, now))
+
+    summary = dict(edges.counts)
+    summary['unchanged'] = len(new) - sum(
+        n for tag, n in edges.counts.items() if tag != 'removed')
+
+    return summary
+
+
+def target_key(doc):
+    # identity of a target across reloads
+    if doc.get('issn_list'):
+        return ' '.join(sorted(doc['issn_list']))
+    return doc.get('title_country_key') or str(doc['_id'])
+
+
+def target_keys(collection, links):
+    '''
+    Return {target_id: target_key()} of the targets of the links found
+    in the raw collection.
+    '''
+    ids = set(link['target_id'] for link in links.values())
+
+    return {
+        str(d['_id']): target_key(d)
+        for d in collection.find(
+            {'_id': {'$in': [ObjectId(i) if ObjectId.is_valid(i) else i for i in ids]}},
+            {'issn_list': 1, 'title_country_key': 1})}
+
+
+def keyed(links, keys):
+    # links compared by target_key(), the missing targets by target_id
+    return {
+        source_id: dict(edge(link), target_id=keys.get(link['target_id'], link['target_id']))
+        for source_id, link in links.items()}
+
+
+def diff(dbcol1, dbcol2, old, new, file_name, target=None):
+    '''
+    Write the changes from old to new links as JSON Lines in file_name,
+    nothing is written in MongoDB. Return the number of changes by
+    stage, 'removed' and 'unchanged', as save().
+    target = raw collection the new links point to, e.g. the staging
+    collection of DataSet2, default is the collection of dbcol2
+    '''
+    db1 = dbcol1._class_name
+    db2 = dbcol2._class_name
+
+    live = dbcol2._get_collection()
+    old_keys = target_keys(live, old)
+    # the links of the last run kept by the match point to live targets
+    new_keys = target_keys(live, new)
+    if target is not None:
+        new_keys.update(target_keys(target, new))
+
+    summary = {}
+
+    with open(file_name, 'w', encoding='utf-8') as f:
+
+        for change, source_id, old_link, link in changes(
+                keyed(old, old_keys), keyed(new, new_keys)):
+
+            f.write(json.dumps({
+                'change': change,
+                'source': db1,
+                'source_id': str(source_id),
+                'target': db2,
+                'old': edge(old[source_id]) if old_link else None,
+                'new': edge(new[source_id]) if link else None,
+                'old_key': old_link['target_id'] if old_link else None,
+                'new_key': link['target_id'] if link else None}) + '\n')
+
+            tag = 'removed' if change == 'removed' else link['stage']
+            summary[tag] = summary.get(tag, 0) + 1
+
+    summary['unchanged'] = len(new) - sum(
+        n for tag, n in summary.items() if tag != 'removed')
+
+    return summary
+
+
+def materialize(dbcol1, dbcol2, batch_size=1000):
+    '''
+    Write the fields of DataSet1 from all the links of the pair.
+    '''
+    col = dbcol2._class_name.lower()
+    now = datetime.datetime.now()
+
+    with BulkWriter(dbcol1._get_collection(), batch_size) as fields:
+        for source_id, link in load(dbcol1._class_name, dbcol2._class_name).items():
+            fields.set(source_id, link_fields(col, link, now), tag='materialized')
+
+    return fields.counts
+
+
+def drop(dbcol1, dbcol2, batch_size=1000):
+    '''
+    Remove the links of the pair and reset their fields in DataSet1.
+    '''
+    db1 = dbcol1._class_name
+    db2 = dbcol2._class_name
+    col = db2.lower()
+    now = datetime.datetime.now()
+
+    with BulkWriter(dbcol1._get_collection(), batch_size) as fields:
+        for source_id in load(db1, db2):
+            fields.update(source_id, unlink_fields(col, now), tag='removed')
+
+    models.Links._get_collection().delete_many({'source': db1, 'target': db2})
+
+    msg = '%s x %s : %d links removed' % (db1, db2, fields.counts.get('removed', 0))
+    logger.info(msg)
+    print(msg)
+
+    return fields.counts
@@ -5,15 +5,51 @@ This script perform data matching between two journals Data Sets
 of various sources.
 '''
 import logging
-import datetime
-from mongoengine import *
 import models
+from match import target_index
+from match import links
+from match import merge_join
+from match import aggregation
+import bloom
 
 logging.basicConfig(filename='logs/matches.info.txt', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def match(dbcol1, dbcol2, country=None):
+def match(dbcol1, dbcol2, country=None, batch_size=1000, fuzzy=None, dry_run=None,
+          engine='index', target=None):
+    '''
+    Return the number of written links by stage.
+    batch_size = number of updates sent in each bulk write
+    fuzzy = similarity threshold (0 to 1) to link by similar title and
+    country when the other stages fail, e.g.: 0.8
+    dry_run = JSON Lines file name of the added, changed and removed
+    links, e.g.: 'logs/scielo_scopus.jsonl', nothing is written
+    engine = 'index' (DataSet2 in memory), 'merge_join' (sorted
+    streams of both collections in constant memory, see
+    match.merge_join) or 'aggregation' (on the server, see
+    match.aggregation), the last two without the fuzzy stage, the dry
+    run and the Links collection
+    target = raw collection read as DataSet2 in a dry run, e.g. the
+    staging collection of a load of dbcol2 not swapped in yet
+
+    The links are kept in the Links collection and the fields of dbcol1
+    are written only for the links that changed since the last run.
+    '''
+
+    if engine in ('merge_join', 'aggregation'):
+        if fuzzy is not None or dry_run is not None:
+            raise ValueError('fuzzy and dry_run are not supported by the %s engine' % engine)
+        if engine == 'aggregation':
+            return aggregation.match(dbcol1, dbcol2, country)
+        return merge_join.match(dbcol1, dbcol2, country, batch_size)
+
+    if engine != 'index':
+        raise ValueError('unknown match engine: %s' % engine)
+
+    # links to documents not in the live collection are never saved
+    if target is not None and dry_run is None:
+        raise ValueError('target is only read in a dry run')
 
     db1 = dbcol1._class_name
     db2 = dbcol2._class_name
@@ -21,157 +57,98 @@ def match(dbcol1, dbcol2, country=None):
     # DataSet2 - name of DB collection 2. e.g.: 'jcr'
     col = dbcol2._class_name.lower()
 
-    # for each document in dbcol1
-    for doc in dbcol1.objects().batch_size(5):
-
-        flag = 0
-
-        # e.g.: if doc.is_scielo == 0
-        if eval('doc.is_' + col + ' == 0'):
-
-            # 1) Try match for each ISSN from the issn_list
-            for issn in doc.issn_list:
-
-                if flag == 0:
-
-                    query_issn = ''
-
-                    query_issn = dbcol2.objects.filter(issn_list=issn)
-
-                    # 1.1) If query retured only 1 document (by ISSN)
-                    if len(query_issn) == 1 and flag == 0:
-
-                        countrycol = ''
-
-                        if 'country' in query_issn[0]:
-                            if country == 1:
-                                countrycol = query_issn[0].country
-                        else:
-                            countrycol = None
-
-                        data_modify = {
-                            'is_' + col: 1,
-                            col + '_id': str(query_issn[0].id),
-                            'updated_at': datetime.datetime.now,
-                            'country_' + col: countrycol}
-
-                        doc.modify(**data_modify)
-                        doc.save()  # save in dbcol1 collection
-
-                        msg = '%s : ISSN %s is %s' % (db1, issn, db2)
-                        logger.info(msg)
-                        print(msg)
-                        flag = 1
-
-                        break
-
-                    '''
-                    1.2) If query returned more than 1 document, try by
-                    ISSN and similar title
-                    '''
-                    if len(query_issn) > 1 and flag == 0:
-
-                        query_issn_title = ''
+    # DataSet2 is read only once: ISSN and title_country in memory indexes
+    index = target_index.TargetIndex.from_collection(dbcol2, collection=target)
 
-                        query_issn_title = dbcol2.objects.filter(issn_list=issn, title__iexact=doc.title)
+    if fuzzy is not None:
+        index.build_fuzzy()
 
-                        if len(query_issn_title) == 1:
+    # filter of ISSNs and titles of DataSet2, None when not up to date
+    # or when another collection is read
+    bf = bloom.load(dbcol2) if target is None else None
 
-                            countrycol = ''
-                            if 'country' in query_issn[0]:
-                                if country == 1:
-                                    countrycol = query_issn[0].country
-                            else:
-                                countrycol = None
+    # links of the last run, these documents are evaluated again
+    old = links.load(db1, db2)
 
-                            data_modify = {
-                                'is_' + col: 1,
-                                col + '_id': str(query_issn_title[0].id),
-                                'updated_at': datetime.datetime.now,
-                                'country_' + col: countrycol}
-                            doc.modify(**data_modify)
-                            doc.save()  # save in dbcol1 collection
+    query = {'is_' + col: 0}
+    if old:
+        query = {'$or': [query, {'_id': {'$in': list(old)}}]}
 
-                            msg = '%s : ISSN and title : %s : %s is %s' % (db1, issn, doc.title, db2)
-                            logger.info(msg)
-                            print(msg)
+    new = {}
 
-                            flag = 1
+    not_found = 0
 
-                            break
+    # for each document in dbcol1 e.g.: if doc.is_scielo == 0
+    for doc in dbcol1._get_collection().find(
+            query, {'issn_list': 1, 'title': 1, 'title_country': 1}):
 
-                        '''
-                        1.2.1) If query by ISSN and similar title is 0 or more
-                        than 1, get the document with more indicators from
-                        query by ISSN (query_issn_scopus)
-                        '''
-                        if len(query_issn_title) > 1 and flag == 0:
+        title = doc.get('title')
+        title_country = doc.get('title_country')
 
-                            knum = {}
+        # no ISSN and not the title of title_country in DataSet2
+        miss = fuzzy is None and not bloom.maybe_any(
+            bf,
+            doc.get('issn_list'),
+            target_index.split_title_country(title_country, index.countries)[0]
+            if isinstance(title_country, str) else None)
 
-                            for i, d in enumerate(query_issn):
-                                knum[str(d.id)] = len([k for k in query_issn[i]])
+        link = None if miss else target_index.resolve(
+            index,
+            doc.get('issn_list'),
+            title=title,
+            title_country=title_country,
+            country=country,
+            fuzzy=fuzzy)
 
-                            countrycol = ''
-                            if 'country' in query_issn[0]:
-                                if country == 1:
-                                    countrycol = query_issn[0].country
-                            else:
-                                countrycol = None
+        # 4) Filter didn't find documents
+        if link is None:
 
-                                data_modify = {
-                                    'is_' + col: 1,
-                                    col + '_id': max(knum, key=knum.get),
-                                    'updated_at': datetime.datetime.now,
-                                    'country_' + col: countrycol}
-                                doc.modify(**data_modify)
-                                doc.save()  # save in dbcol1 collection
+            msg = '%s : %s  %s : not found' % (db1, doc.get('issn_list'), title)
+            logger.info(msg)
+            print(msg)
 
-                            msg = '%s : ISSN %s is %s with %s fields)' % (db1, issn, db2, str(max(knum, key=knum.get)))
-                            logger.info(msg)
-                            print(msg)
+            not_found += 1
 
-                            flag = 1
+            continue
 
-                            break
+        if link['save']:
+            new[doc['_id']] = link
+        elif doc['_id'] in old:
+            # found without writing: the link of the last run is kept
+            new[doc['_id']] = old[doc['_id']]
 
-            # 2) If flag is still zero, try by similarity of title and country
-            if flag == 0:
+        if link['stage'] == '1.1':
+            msg = '%s : ISSN %s is %s' % (db1, link['issn'], db2)
 
-                if 'title_country' in doc:
-                    query_title_pais = dbcol2.objects.filter(title_country__iexact=doc.title_country)
+        if link['stage'] == '1.2':
+            msg = '%s : ISSN and title : %s : %s is %s' % (db1, link['issn'], title, db2)
 
-                    if len(query_title_pais) > 0:
+        if link['stage'] == '1.2.1':
+            msg = '%s : ISSN %s is %s with %s fields)' % (db1, link['issn'], db2, link['target_id'])
 
-                        countrycol = ''
-                        if 'country' in query_title_pais[0]:
-                            if country == 1:
-                                countrycol = query_title_pais[0].country
-                            else:
-                                countrycol = None
+        if link['stage'] == '2':
+            msg = '%s : title and country : %s is %s' % (db1, title_country, db2)
 
-                        data_modify = {
-                            'is_' + col: 1,
-                            col + '_id': str(query_title_pais[0].id),
-                            'updated_at': datetime.datetime.now,
-                            'country_' + col: countrycol}
-                        doc.modify(**data_modify)
-                        doc.save()  # save in dbcol1 collection
+        if link['stage'] == '3':
+            msg = '%s : similar title and country : %s is %s %s (%s)' % (
+                db1, title_country, db2, link['target_id'], link['score'])
 
-                        msg = '%s : title and country : %s is %s' % (db1, doc.title_country, db2)
-                        logger.info(msg)
-                        print(msg)
+        logger.info(msg)
+        print(msg)
 
-                        flag = 1
+    if dry_run is None:
+        summary = links.save(dbcol1, dbcol2, old, new, batch_size)
+    else:
+        summary = links.diff(dbcol1, dbcol2, old, new, dry_run, target)
 
-            # 3) If flag is still zero, filter didn't find documents
-            if flag == 0:
+    summary['not found'] = not_found
 
-                msg = '%s : %s  %s : not found' % (db1, doc.issn_list, doc.title)
-                logger.info(msg)
-                print(msg)
+    msg = '%s x %s%s : %s' % (db1, db2, ' (dry run)' if dry_run else '', ', '.join(
+        '%s: %d' % (k, summary[k]) for k in sorted(summary)))
+    logger.info(msg)
+    print(msg)
 
-                pass
+    return summary
 
 
 def main():
@@ -0,0 +1,195 @@
+# coding: utf-8
+'''
+This script performs the match between two journals Data Sets as a
+merge-join of sorted streams.
+
+Both collections are read by the server as (issn, _id) pairs, unwinding
+issn_list and sorting by ISSN, and the two streams are joined in one
+pass. Then the documents not linked by ISSN are joined in the same way
+by title_country_key. Neither collection is held in memory: only the
+candidates of one ISSN are kept, and the links are written as the join
+advances.
+'''
+import logging
+import datetime
+import tracemalloc
+from itertools import groupby
+
+from match import target_index
+from bulk_writer import BulkWriter
+
+logging.basicConfig(filename='logs/matches.info.txt', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def sorted_stream(dbcol, match, fields, key, pos=None):
+    '''
+    Aggregation cursor of the documents sorted by key.
+    key = 'issn_list' to join by ISSN: one document by ISSN, or only the
+    ISSN at position pos of issn_list
+    '''
+    fields = dict(fields)
+    if pos is not None:
+        fields['issn_list'] = {'$arrayElemAt': ['$issn_list', pos]}
+
+    pipeline = [{'$match': match}, {'$project': fields}]
+
+    if key == 'issn_list' and pos is None:
+        pipeline.append({'$unwind': '$issn_list'})
+
+    pipeline.extend([
+        {'$match': {key: {'$type': 'string'}}},
+        {'$sort': {key: 1, '_id': 1}}])
+
+    return dbcol._get_collection().aggregate(pipeline, allowDiskUse=True)
+
+
+def max_issns(dbcol, match):
+    # length of the longest issn_list of the documents
+    result = next(dbcol._get_collection().aggregate([
+        {'$match': match},
+        {'$group': {'_id': None, 'n': {
+            '$max': {'$size': {'$ifNull': ['$issn_list', []]}}}}}]), None)
+    return result['n'] if result else 0
+
+
+def merge_join(left, right, key):
+    '''
+    Yield (value, left group, right group) for each value of key found
+    in both streams, the streams must be sorted by key.
+    '''
+    lgroups = groupby(left, key=lambda d: d[key])
+    rgroups = groupby(right, key=lambda d: d[key])
+
+    lg = next(lgroups, None)
+    rg = next(rgroups, None)
+
+    while lg is not None and rg is not None:
+        if lg[0] < rg[0]:
+            lg = next(lgroups, None)
+        elif lg[0] > rg[0]:
+            rg = next(rgroups, None)
+        else:
+            yield lg[0], list(lg[1]), list(rg[1])
+            lg = next(lgroups, None)
+            rg = next(rgroups, None)
+
+
+def match(dbcol1, dbcol2, country=None, batch_size=1000):
+    '''
+    Same stages as matches.match(), return the number of updated
+    documents by stage and the peak memory allocated by the run.
+
+    The links are written as the join advances and are not kept: the ISSN
+    stages run once by position in issn_list, the documents linked by a
+    previous position are left out of the next ones by is_<col>, as the
+    first ISSN with a link wins. Only the ids of the documents found but
+    not written (stage 1.2.1) are kept to leave them out too.
+    The Links collection is not updated by this engine.
+    '''
+    db1 = dbcol1._class_name
+    db2 = dbcol2._class_name
+    col = db2.lower()
+
+    # found without writing (stage 1.2.1 with a country)
+    kept = set()
+
+    now = datetime.datetime.now()
+
+    # the peak of this run, not of the process (e.g. the runner workers)
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    try:
+        with BulkWriter(dbcol1._get_collection(), batch_size) as writer:
+
+            # 1) ISSN stages, one join by position of the ISSN in issn_list
+            for pos in range(max_issns(dbcol1, {'is_' + col: 0})):
+
+                source = sorted_stream(
+                    dbcol1, {'is_' + col: 0}, {'issn_list': 1, 'title': 1},
+                    'issn_list', pos)
+                target = sorted_stream(
+                    dbcol2, {},
+                    {'issn_list': 1, 'title': 1, 'country': 1,
+                     'nfields': target_index.NFIELDS},
+                    'issn_list')
+
+                for issn, sources, targets in merge_join(source, target, 'issn_list'):
+
+                    # candidates of this ISSN only
+                    index = target_index.TargetIndex()
+                    for t in targets:
+                        index.add(
+                            str(t['_id']), [issn],
+                            title=t.get('title'),
+                            country=t.get('country'),
+                            nfields=t['nfields'])
+
+                    for s in sources:
+                        if s['_id'] in kept:
+                            continue
+
+                        link = target_index.resolve(
+                            index, [issn], title=s.get('title'), country=country)
+
+                        if link is None:
+                            continue
+
+                        if not link['save']:
+                            kept.add(s['_id'])
+                            continue
+
+                        writer.set(s['_id'], {
+                            'is_' + col: 1,
+                            col + '_id': link['target_id'],
+                            'linked_at': now,
+                            'country_' + col: link['country']},
+                            tag=link['stage'])
+
+                # the next position reads is_<col> of these links
+                writer.flush()
+
+            # 2) title and country stage, documents not linked by ISSN
+            source = sorted_stream(
+                dbcol1,
+                {'is_' + col: 0, 'title_country_key': {'$exists': True}},
+                {'title_country_key': 1},
+                'title_country_key')
+            target = sorted_stream(
+                dbcol2,
+                {'title_country_key': {'$exists': True}},
+                {'title_country_key': 1, 'country': 1},
+                'title_country_key')
+
+            for key, sources, targets in merge_join(source, target, 'title_country_key'):
+
+                first = {'country': targets[0].get('country')}
+
+                for s in sources:
+                    if s['_id'] in kept:
+                        continue
+
+                    writer.set(s['_id'], {
+                        'is_' + col: 1,
+                        col + '_id': str(targets[0]['_id']),
+                        'linked_at': now,
+                        'country_' + col: target_index.country_value(first, country, '2')},
+                        tag='2')
+
+        summary = dict(writer.counts)
+
+        # Python allocations of the run
+        summary['peak memory (KB)'] = tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    msg = '%s x %s merge-join : %s' % (db1, db2, ', '.join(
+        '%s: %d' % (k, summary[k]) for k in sorted(summary)))
+    logger.info(msg)
+    print(msg)
+
+    return summary
@@ -0,0 +1,141 @@
+# coding: utf-8
+'''
+MinHash signatures and LSH buckets for the similarity of journal titles.
+
+Titles are compared by the Jaccard similarity of their character
+trigrams, after removing punctuation and articles. When only one of the
+titles has a subtitle or a parallel title, their main titles (the text
+before it) are compared too, and the best of both similarities is the
+score. Two titles with different subtitles are compared as a whole, so
+'Journal of Physics: Conference Series' is not 'Journal of Physics:
+Condensed Matter'.
+'''
+import re
+import random
+import zlib
+
+from accent_remover import title_key
+
+
+# articles and connectives ignored in titles
+STOPWORDS = set([
+    'a', 'an', 'and', 'the', 'of', 'for', 'in', 'on',
+    'o', 'os', 'as', 'da', 'das', 'do', 'dos', 'de', 'e', 'em',
+    'el', 'la', 'los', 'las', 'del', 'y', 'en',
+    'le', 'les', 'du', 'des', 'et',
+    'der', 'die', 'das', 'und'])
+
+# subtitle or parallel title separators
+SUBTITLE = re.compile(r'\s*[:=/(]\s*|\s+-\s+')
+
+PRIME = (1 << 61) - 1
+
+
+def words(title):
+    text = re.sub(r'[^\w\s]', ' ', title_key(title))
+    return [w for w in text.split() if w not in STOPWORDS]
+
+
+def shingles(title):
+    text = ' '.join(words(title))
+    if len(text) < 3:
+        return set([text]) if text else set()
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def main_title(title):
+    return SUBTITLE.split(title_key(title), 1)[0]
+
+
+def has_subtitle(title):
+    parts = SUBTITLE.split(title_key(title), 1)
+    return len(parts) > 1 and bool(words(parts[1]))
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / float(len(a | b))
+
+
+def similarity(title1, title2):
+    score = jaccard(shingles(title1), shingles(title2))
+
+    # a title with a subtitle and the same title without it
+    if has_subtitle(title1) != has_subtitle(title2):
+        score = max(
+            score, jaccard(shingles(main_title(title1)), shingles(main_title(title2))))
+
+    return score
+
+
+class TitleLSH(object):
+    '''
+    LSH index of titles by country: num_perm = bands * rows MinHash
+    values, two titles are candidates when all the rows of a band agree.
+    '''
+
+    def __init__(self, bands=16, rows=4, seed=1):
+        self.bands = bands
+        self.rows = rows
+
+        rnd = random.Random(seed)
+        self.perms = [
+            (rnd.randint(1, PRIME - 1), rnd.randint(0, PRIME - 1))
+            for i in range(bands * rows)]
+
+        # (kind, country, band, values) -> set of ids, kind is 'title' for
+        # the whole title and 'main' for the main title of a subtitled one
+        self.buckets = {}
+        # id -> title
+        self.titles = {}
+
+    def signature(self, sh):
+        hashes = [zlib.crc32(s.encode('utf-8')) for s in sh]
+        return [min((a * h + b) % PRIME for h in hashes) for a, b in self.perms]
+
+    def keys(self, kind, title, country):
+        sh = shingles(title)
+        if not sh:
+            return
+        sig = self.signature(sh)
+        for band in range(self.bands):
+            yield (kind, country, band, tuple(sig[band * self.rows:(band + 1) * self.rows]))
+
+    def add(self, _id, title, country):
+        self.titles[_id] = title
+
+        keys = list(self.keys('title', title, country))
+        if has_subtitle(title):
+            keys.extend(self.keys('main', main_title(title), country))
+
+        for key in keys:
+            self.buckets.setdefault(key, set()).add(_id)
+
+    def candidates(self, title, country):
+        # the same title, and the titles with or without a subtitle
+        # whose main title is the same (see similarity())
+        if has_subtitle(title):
+            keys = list(self.keys('title', title, country))
+            keys.extend(self.keys('title', main_title(title), country))
+        else:
+            keys = list(self.keys('title', title, country))
+            keys.extend(self.keys('main', title, country))
+
+        result = set()
+        for key in keys:
+            result.update(self.buckets.get(key, ()))
+        return result
+
+    def best(self, title, country, threshold):
+        '''
+        Return (id, score) of the most similar title of the same country
+        with score >= threshold, or None.
+        '''
+        best = None
+        # sorted: the same candidate wins in every run
+        for _id in sorted(self.candidates(title, country)):
+            score = similarity(title, self.titles[_id])
+            if score >= threshold and (best is None or score > best[1]):
+                best = (_id, score)
+        return best
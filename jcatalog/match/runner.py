@@ -0,0 +1,215 @@
+# coding: utf-8
+'''
+This script runs the matches between all journals Data Sets in a
+process pool.
+
+A pair (DataSet1, DataSet2) writes only in the DataSet1 collection, so
+two pairs with the same DataSet1 are never run at the same time.
+
+A pair is skipped when its two collections did not change since its
+last run (manifest.py). The links written by a match do not change the
+result of the other pairs, so the collections are fingerprinted again
+after the run and every pair is recorded with those fingerprints.
+'''
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import models
+import bloom
+import manifest
+import staging
+from match import matches
+from match import incremental
+
+logging.basicConfig(filename='logs/matches.info.txt', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# (DataSet1, DataSet2, country)
+PAIRS = [
+    # SciELO
+    ('Scielo', 'Jcr', 1),
+    ('Scielo', 'Wos', 1),
+    ('Scielo', 'Scopus', 1),
+    ('Scielo', 'Scimago', 1),
+    ('Scielo', 'Cwts', 1),
+    ('Scielo', 'Submissions', None),
+
+    # JCR
+    ('Jcr', 'Scielo', 1),
+    ('Jcr', 'Scopus', 1),
+    ('Jcr', 'Scimago', 1),
+    ('Jcr', 'Cwts', 1),
+    ('Jcr', 'Wos', 1),
+
+    # WOS
+    ('Wos', 'Scielo', 1),
+    ('Wos', 'Jcr', 1),
+    ('Wos', 'Scopus', 1),
+    ('Wos', 'Scimago', 1),
+    ('Wos', 'Cwts', 1),
+
+    # Scopus
+    ('Scopus', 'Jcr', 1),
+    ('Scopus', 'Scielo', 1),
+    ('Scopus', 'Scimago', 1),
+    ('Scopus', 'Cwts', 1),
+    ('Scopus', 'Wos', 1),
+
+    # Scimago
+    ('Scimago', 'Jcr', 1),
+    ('Scimago', 'Scielo', 1),
+    ('Scimago', 'Scopus', 1),
+    ('Scimago', 'Cwts', 1),
+    ('Scimago', 'Wos', 1),
+
+    # CWTS
+    ('Cwts', 'Jcr', 1),
+    ('Cwts', 'Wos', 1),
+    ('Cwts', 'Scielo', 1),
+    ('Cwts', 'Scopus', 1),
+    ('Cwts', 'Scimago', 1),
+
+    # WOSIndexes
+    ('Wosindexes', 'Scielo', 1)
+]
+
+
+def run_pair(db1, db2, country, changes_only=False, engine='index', fuzzy=None):
+    # runs in a worker process, models are looked up by class name
+    start = time.time()
+
+    if changes_only:
+        summary = incremental.match_incremental(
+            getattr(models, db1), getattr(models, db2), country, fuzzy=fuzzy)
+    else:
+        summary = matches.match(
+            getattr(models, db1), getattr(models, db2), country,
+            fuzzy=fuzzy, engine=engine)
+
+    return time.time() - start, summary
+
+
+def fingerprint(name):
+    # number of documents and digest of the fields read by the matches
+    return bloom.stamp(getattr(models, name), staging.MATCH_FIELDS)
+
+
+def stage(pair):
+    return 'match:%s:%s' % (pair[0], pair[1])
+
+
+def run(pairs=PAIRS, workers=None, changes_only=False, force=False, engine='index',
+        fuzzy=None):
+    '''
+    Return {(DataSet1, DataSet2): (seconds, summary)} of the pairs run,
+    the summary of a failed pair is {'error': message}.
+    workers = number of processes, default is the number of cores
+    changes_only = True to match only the changes since the last run
+    force = True to run the pairs whose collections did not change
+    engine = match engine of the full matches, 'index', 'merge_join' or
+    'aggregation'
+    fuzzy = similarity threshold of the similar title stage, see match()
+
+    A pair run with other options (country, changes_only, engine,
+    fuzzy), or after a load or an update of one of its collections, is
+    not skipped: they are inputs of the pair in the manifest.
+    '''
+    workers = workers or os.cpu_count()
+
+    m = manifest.Manifest()
+
+    names = set(p[0] for p in pairs) | set(p[1] for p in pairs)
+    fingerprints = {name: fingerprint(name) for name in names}
+
+    def deps(pair):
+        result = {
+            pair[0]: fingerprints[pair[0]],
+            pair[1]: fingerprints[pair[1]],
+            'options': {
+                'country': pair[2],
+                'changes_only': changes_only,
+                'engine': engine,
+                'fuzzy': fuzzy}}
+        # the loads and updates of the two collections
+        result.update(m.digests(pair[0], pair[1], kinds=('load', 'update')))
+        return result
+
+    pending = [p for p in pairs if force or m.changed(stage(p), deps=deps(p))]
+    running = {}
+    # DataSet1 collections being written
+    busy = set()
+    result = {}
+    # pairs whose match raised an error, run again the next time
+    failed = set()
+
+    start = time.time()
+
+    # spawn: each worker opens its own MongoDB connection
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn')) as pool:
+
+        while pending or running:
+
+            for pair in list(pending):
+                if len(running) < workers and pair[0] not in busy:
+                    pending.remove(pair)
+                    busy.add(pair[0])
+                    running[pool.submit(
+                        run_pair, *pair, changes_only, engine, fuzzy)] = pair
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                db1, db2, country = running.pop(future)
+                busy.discard(db1)
+
+                try:
+                    seconds, summary = future.result()
+                except Exception as e:
+                    failed.add((db1, db2))
+                    result[(db1, db2)] = (0, {'error': repr(e)})
+
+                    msg = 'runner : %s x %s : failed : %r' % (db1, db2, e)
+                    logger.exception(msg)
+                    print(msg)
+                    continue
+
+                result[(db1, db2)] = (seconds, summary)
+
+                msg = 'runner : %s x %s : %.1fs' % (db1, db2, seconds)
+                logger.info(msg)
+                print(msg)
+
+    # the collections after the links written by this run
+    fingerprints = {name: fingerprint(name) for name in names}
+
+    for pair in pairs:
+        if pair[:2] in failed:
+            continue
+        m.record(
+            stage(pair),
+            deps=deps(pair),
+            result=result.get(pair[:2], m.result(stage(pair))))
+
+    msg = 'runner : %d pairs run, %d failed, %d unchanged : %.1fs' % (
+        len(result) - len(failed), len(failed), len(pairs) - len(result),
+        time.time() - start)
+    if failed:
+        msg += ' : failed %s' % ', '.join('%s x %s' % p for p in sorted(failed))
+    logger.info(msg)
+    print(msg)
+
+    return result
+
+
+def main():
+    run()
+
+
+if __name__ == "__main__":
+    main()
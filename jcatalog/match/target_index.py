@@ -0,0 +1,223 @@
+# coding: utf-8
+'''
+In-memory index of a journals Data Set used by the match engine.
+
+The target collection is read once and kept as an ISSN -> candidate ids
+index and a title_country key -> candidate ids index, so the match
+stages can be resolved without querying MongoDB for each ISSN. Titles
+are compared by their canonical key (accent_remover.title_key).
+'''
+from accent_remover import title_key
+from match.minhash import TitleLSH
+
+
+# field_count of the document (completeness.field_count), or its number
+# of fields when it was loaded before the field_count
+NFIELDS = {'$ifNull': ['$field_count', {'$size': {'$objectToArray': '$$ROOT'}}]}
+
+
+class TargetIndex(object):
+
+    def __init__(self):
+        # issn -> [target ids], in the collection natural order
+        self.issn = {}
+        # title_country key -> [target ids]
+        self.title_country = {}
+        # target id -> {'title' key, 'country', 'nfields'}
+        self.docs = {}
+        # target id -> (title, country) from title_country
+        self.title_country_ids = {}
+        # title_key of the countries of the targets
+        self.countries = set()
+        # optional TitleLSH of the similar title stage
+        self.fuzzy = None
+
+    def add(self, _id, issn_list, title=None, title_country=None,
+            country=None, nfields=0):
+
+        self.docs[_id] = {
+            'title': title_key(title) if isinstance(title, str) else None,
+            'country': country,
+            'nfields': nfields}
+
+        for issn in issn_list or []:
+            ids = self.issn.setdefault(issn, [])
+            # the same document is returned only once by the query
+            if _id not in ids:
+                ids.append(_id)
+
+        if isinstance(country, str) and country:
+            self.countries.add(title_key(country))
+
+        if isinstance(title_country, str):
+            self.title_country.setdefault(title_key(title_country), []).append(_id)
+            self.title_country_ids[_id] = split_title_country(
+                title_country,
+                [title_key(country)] if isinstance(country, str) and country else ())
+
+    def by_issn(self, issn):
+        return self.issn.get(issn, [])
+
+    def by_issn_title(self, issn, title):
+        if not isinstance(title, str):
+            return []
+        title = title_key(title)
+        return [i for i in self.by_issn(issn) if self.docs[i]['title'] == title]
+
+    def by_title_country(self, title_country):
+        if not isinstance(title_country, str):
+            return []
+        return self.title_country.get(title_key(title_country), [])
+
+    def build_fuzzy(self):
+        self.fuzzy = TitleLSH()
+        for _id, (title, country) in self.title_country_ids.items():
+            self.fuzzy.add(_id, title, country)
+
+    @classmethod
+    def from_collection(cls, dbcol, query=None, collection=None):
+        '''
+        query = raw MongoDB filter to index only part of the collection
+        collection = raw collection read instead of the one of dbcol,
+        e.g. its staging collection
+        '''
+        index = cls()
+
+        if collection is None:
+            collection = dbcol._get_collection()
+
+        for d in collection.aggregate([
+                {'$match': query or {}},
+                {'$project': {
+                    'issn_list': 1,
+                    'title': 1,
+                    'title_country': 1,
+                    'country': 1,
+                    'nfields': NFIELDS}}]):
+            index.add(
+                str(d['_id']),
+                d.get('issn_list') or [],
+                title=d.get('title'),
+                title_country=d.get('title_country'),
+                country=d.get('country'),
+                nfields=d['nfields'])
+
+        return index
+
+
+def split_title_country(title_country, countries=()):
+    '''
+    Return (title, country) of 'title-country'. The title and the
+    country may have '-' (e.g.: 'guinea-bissau'), so the longest known
+    country ending title_country is taken, or the text after the last
+    '-' when none is known.
+    countries = title_key of the known countries
+    '''
+    key = title_key(title_country)
+
+    for country in sorted(countries, key=len, reverse=True):
+        if key.endswith('-' + country) and len(key) > len(country) + 1:
+            return key[:-len(country) - 1], country
+
+    title, sep, country = key.rpartition('-')
+    return title, country
+
+
+def country_value(doc, country, stage):
+    '''
+    Value of country_<col> as written by the original match() stages.
+    '''
+    if stage == '2':
+        if doc['country'] is not None:
+            return doc['country'] if country == 1 else None
+        return ''
+
+    if doc['country'] is not None:
+        return doc['country'] if country == 1 else ''
+    return None
+
+
+def resolve(index, issn_list, title=None, title_country=None, country=None,
+            fuzzy=None):
+    '''
+    Resolve one document of DataSet1 against the index of DataSet2.
+
+    Return None when nothing was found, otherwise a dict with the stage
+    ('1.1', '1.2', '1.2.1', '2' or '3'), the ISSN used, the target id, the
+    country_<col> value and 'save', False when the original match()
+    flagged the document as found without writing it.
+
+    fuzzy = similarity threshold (0 to 1) of the optional stage 3, the
+    index must have been prepared with build_fuzzy()
+    '''
+    # 1) Try match for each ISSN from the issn_list
+    for issn in issn_list or []:
+
+        query_issn = index.by_issn(issn)
+
+        # 1.1) Only 1 document by ISSN
+        if len(query_issn) == 1:
+            return {
+                'stage': '1.1',
+                'issn': issn,
+                'target_id': query_issn[0],
+                'country': country_value(index.docs[query_issn[0]], country, '1.1'),
+                'save': True}
+
+        # 1.2) More than 1 document, try by ISSN and similar title
+        if len(query_issn) > 1:
+
+            first = index.docs[query_issn[0]]
+            query_issn_title = index.by_issn_title(issn, title)
+
+            if len(query_issn_title) == 1:
+                return {
+                    'stage': '1.2',
+                    'issn': issn,
+                    'target_id': query_issn_title[0],
+                    'country': country_value(first, country, '1.2'),
+                    'save': True}
+
+            # 1.2.1) More than 1 by ISSN and title, get the document
+            # with more fields from the query by ISSN
+            if len(query_issn_title) > 1:
+                knum = {}
+                for i in query_issn:
+                    knum[i] = index.docs[i]['nfields']
+
+                # as in the original stage, the link is saved only when
+                # the first candidate has no country
+                return {
+                    'stage': '1.2.1',
+                    'issn': issn,
+                    'target_id': max(knum, key=knum.get),
+                    'country': country_value(first, country, '1.2.1'),
+                    'save': first['country'] is None}
+
+    # 2) Try by similarity of title and country
+    query_title_pais = index.by_title_country(title_country)
+
+    if len(query_title_pais) > 0:
+        return {
+            'stage': '2',
+            'issn': None,
+            'target_id': query_title_pais[0],
+            'country': country_value(index.docs[query_title_pais[0]], country, '2'),
+            'save': True}
+
+    # 3) Try by similar title in the same country
+    if fuzzy is not None and index.fuzzy is not None and isinstance(title_country, str):
+
+        best = index.fuzzy.best(
+            *split_title_country(title_country, index.countries), threshold=fuzzy)
+
+        if best is not None:
+            return {
+                'stage': '3',
+                'issn': None,
+                'target_id': best[0],
+                'country': country_value(index.docs[best[0]], country, '2'),
+                'save': True,
+                'score': round(best[1], 4)}
+
+    return None
@@ -0,0 +1,52 @@
+# coding: utf-8
+'''
+Disjoint sets (union-find) with path compression and union by size.
+'''
+
+
+class UnionFind(object):
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, x):
+        if x not in self.parent:
+            self.parent[x] = x
+            self.size[x] = 1
+            return x
+
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+
+        # path compression
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+
+        return root
+
+    def union(self, a, b):
+        ra = self.find(a)
+        rb = self.find(b)
+
+        if ra == rb:
+            return ra
+
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+
+        return ra
+
+    def components(self):
+        '''
+        Return {root: [members]}, members in insertion order.
+        '''
+        result = {}
+        for x in self.parent:
+            result.setdefault(self.find(x), []).append(x)
+
+        return result
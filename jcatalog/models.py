@@ -30,7 +30,9 @@ class Scielo(DynamicDocument):
     meta = {
         'indexes': [
             'issn_list',
-            'title_country'
+            'title_country',
+            'title_key',
+            'title_country_key'
         ]
     }
 
@@ -73,12 +75,15 @@ class Scimago(DynamicDocument):
     is_scopus = IntField(required=True, min_value=0, default=0)
     is_jcr = IntField(required=True, min_value=0, default=0)
     is_wos = IntField(required=True, min_value=0, default=0)
+    is_cwts = IntField(required=True, min_value=0, default=0)
     inscielo = IntField(required=True, min_value=0, default=0)
     # Indexes
     meta = {
         'indexes': [
             'issn_list',
-            'title_country'
+            'title_country',
+            'title_key',
+            'title_country_key'
         ]
     }
 
@@ -98,6 +103,8 @@ class Scopus(DynamicDocument):
         'indexes': [
             'issn_list',
             'title_country',
+            'title_key',
+            'title_country_key',
             'sourcerecord_id',
             'asjc_code_list',
             'oecd'
@@ -119,7 +126,9 @@ class Jcr(DynamicDocument):
     meta = {
         'indexes': [
             'issn_list',
-            'title_country'
+            'title_country',
+            'title_key',
+            'title_country_key'
         ]
     }
 
@@ -138,7 +147,9 @@ class Wos(DynamicDocument):
     meta = {
         'indexes': [
             'issn_list',
-            'title_country'
+            'title_country',
+            'title_key',
+            'title_country_key'
         ]
     }
 
@@ -157,7 +168,9 @@ class Jcr_scielo(DynamicDocument):
     meta = {
         'indexes': [
             'issn_list',
-            'title_country'
+            'title_country',
+            'title_key',
+            'title_country_key'
         ]
     }
 
@@ -188,7 +201,9 @@ class Cwts(DynamicDocument):
     meta = {
         'indexes': [
             'issn_list',
-            'title_country'
+            'title_country',
+            'title_key',
+            'title_country_key'
         ]
     }
 
@@ -250,7 +265,9 @@ class Wosindexes(DynamicDocument):
     meta = {
         'indexes': [
             'issn_list',
-            'title_country'
+            'title_country',
+            'title_key',
+            'title_country_key'
         ]
     }
 
@@ -271,3 +288,45 @@ class Scielodates(DynamicDocument):
             'pid'
         ]
     }
+
+
+class Matchwatermark(DynamicDocument):
+    creation_date = DateTimeField(default=datetime.datetime.now)
+    updated_at = DateTimeField()
+    # DataSet1 and DataSet2 class names, e.g.: 'Scielo', 'Jcr'
+    source = StringField(required=True)
+    target = StringField(required=True)
+    # start of the last match of the pair
+    watermark = DateTimeField()
+    # number of DataSet2 documents at the watermark
+    target_count = IntField(min_value=0, default=0)
+    # Indexes
+    meta = {
+        'indexes': [
+            ('source', 'target')
+        ]
+    }
+
+
+class Links(DynamicDocument):
+    creation_date = DateTimeField(default=datetime.datetime.now)
+    updated_at = DateTimeField()
+    # DataSet1 and DataSet2 class names, e.g.: 'Scielo', 'Jcr'
+    source = StringField(required=True)
+    source_id = ObjectIdField(required=True)
+    target = StringField(required=True)
+    # as in <col>_id
+    target_id = StringField(required=True)
+    # match stage, e.g.: '1.1'
+    stage = StringField()
+    # similarity of the similar title stage
+    score = FloatField()
+    # value of country_<col>
+    country = StringField()
+    # Indexes
+    meta = {
+        'indexes': [
+            ('source', 'target', 'source_id'),
+            ('target', 'target_id')
+        ]
+    }
@@ -0,0 +1,72 @@
+# coding: utf-8
+'''
+This script writes the reports as stages of the manifest (manifest.py).
+
+A report is written again only when one of the stages of the collections
+it reads (loads, updates and matches) or one of its input files changed
+since its last run. The reports reading the ArticleMeta API are always
+written: their input is not known before the run.
+
+Most reports are scripts, so a report is run as a module, as
+"python -m reports.<report>", and not imported.
+'''
+import runpy
+import logging
+
+import manifest
+
+logging.basicConfig(filename='logs/reports.info.txt', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# report -> (collections, input files)
+REPORTS = {
+    'fapesp_evaluation': (
+        ['Scielo', 'Scopus', 'Wos', 'Doajapi', 'Pubmedapi', 'Jcr'], []),
+    'fapesp_evaluation_line': (
+        ['Scielo', 'Scopus', 'Wos', 'Doajapi', 'Submissions', 'Pubmedapi',
+         'Cwts', 'Scimago', 'Jcr'],
+        ['data/scielo/rotulos_avaliacao_fapesp_abel.xlsx',
+         'data/scielo/fapesp_journals_evaluation_line_r14-com-indicadores por AT e Total-a3-import.xlsx']),
+    'index_coverage_counter': (['Scielo'], []),
+    'invite_scielo_20': ([], []),
+    'jcatalog': (['Scielo', 'Scopus', 'Jcr', 'Submissions', 'Doajapi', 'Scimago'], []),
+    'jcr_export_indicators': (['Scielo', 'Jcr'], []),
+    'licenses': ([], []),
+    'scopus_export_indicators': (['Scielo', 'Scimago', 'Cwts', 'Scopus'], []),
+    'scopus_list1': (['Scopus', 'Jcr', 'Scimago', 'Scielo'], []),
+    'scopus_list2': (['Scopus', 'Scielo', 'Scimago', 'Cwts', 'Jcr'], []),
+    'scopus_scimago_check': (['Scielo', 'Scopus', 'Scimago'], [])}
+
+# read from the ArticleMeta API
+REMOTE = ['invite_scielo_20', 'licenses']
+
+
+def report(name):
+    runpy.run_module('reports.' + name, run_name='__main__')
+
+
+def run(name, force=False):
+    '''
+    Write the report unless its collections and files did not change.
+    '''
+    m = manifest.Manifest()
+
+    names, files = REPORTS[name]
+
+    manifest.run(
+        'report:' + name,
+        lambda: report(name),
+        files=files,
+        deps=m.digests(*names),
+        force=force or name in REMOTE,
+        manifest=m)
+
+
+def main():
+    for name in sorted(REPORTS):
+        run(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# coding: utf-8
+'''
+Cache of parsed sheets.
+
+The records of a sheet are saved in data/cache/ in a columnar binary
+file: groups of GROUP_SIZE rows, each group keeps one list of values by
+column. The file name is the digest of the content hash of the source
+file and of the options of the reading (sheet, keycorrection names,
+column types), so a new file or a new mapping is parsed again.
+
+A cached sheet is read with mmap, one group at a time.
+'''
+import os
+import mmap
+import json
+import struct
+import pickle
+import hashlib
+
+import manifest
+
+
+CACHE_PATH = 'data/cache/'
+
+# version of the file format
+FORMAT = 1
+
+GROUP_SIZE = 1000
+
+LENGTH = struct.Struct('<Q')
+
+
+def cache_key(file_name, **options):
+    '''
+    Digest of the file content and of the reading options.
+    '''
+    # column types by name, e.g.: {'print_issn': 'str'}
+    if options.get('types'):
+        options['types'] = {c: t.__name__ for c, t in options['types'].items()}
+
+    text = json.dumps(
+        {'file': manifest.sha256(file_name), 'options': options, 'format': FORMAT},
+        sort_keys=True, default=str)
+
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def cache_file(key):
+    return os.path.join(CACHE_PATH, key + '.sheet')
+
+
+def write_block(f, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    f.write(LENGTH.pack(len(data)))
+    f.write(data)
+
+
+def write_through(records, file_name):
+    '''
+    Yield the records and save them in file_name when all were read.
+    '''
+    tmp = file_name + '.tmp'
+    folder = os.path.dirname(file_name)
+
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+
+    header = None
+    group = []
+
+    try:
+        with open(tmp, 'wb') as f:
+
+            for rec in records:
+
+                if header is None:
+                    header = list(rec)
+                    write_block(f, header)
+
+                # the values as read: the caller may change rec
+                group.append(tuple(rec.get(k, '') for k in header))
+
+                if len(group) >= GROUP_SIZE:
+                    write_block(f, [list(column) for column in zip(*group)])
+                    group = []
+
+                yield rec
+
+            if header is None:
+                write_block(f, [])
+
+            if group:
+                write_block(f, [list(column) for column in zip(*group)])
+
+        os.replace(tmp, file_name)
+
+    finally:
+        # not read to the end
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def read(file_name):
+    '''
+    Yield the records of a cached sheet.
+    '''
+    with open(file_name, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+
+            pos = 0
+            header = None
+
+            while pos < len(mm):
+                size, = LENGTH.unpack_from(mm, pos)
+                pos += LENGTH.size
+                block = pickle.loads(mm[pos:pos + size])
+                pos += size
+
+                if header is None:
+                    header = block
+                    continue
+
+                for row in zip(*block):
+                    yield dict(zip(header, row))
+
+
+def cached(file_name, parse, **options):
+    '''
+    Records of the sheet from the cache, or from parse() saving them in
+    the cache.
+    '''
+    name = cache_file(cache_key(file_name, **options))
+
+    if os.path.exists(name):
+        return read(name)
+
+    return write_through(parse(), name)
@@ -0,0 +1,170 @@
+# coding: utf-8
+'''
+Streaming reader of CSV and XLSX sheets.
+
+The rows are read one at a time (csv module, openpyxl in read_only mode)
+and yielded as dicts named by the header row, as the records of
+pyexcel.get_sheet(..., name_columns_by_row=0).to_records(), but without
+loading the whole sheet. The keycorrection names and the types of the
+columns are applied while reading.
+
+e.g.:
+    for rec in read_rows(
+            'data/scopus/scopus.xlsx',
+            columns=keycorrection.scopus_columns_names,
+            types={'print_issn': str, 'e_issn': str}):
+'''
+import re
+import csv
+import datetime
+
+import sheet_cache
+
+
+INT = re.compile(r'^-?(0|[1-9][0-9]*)$')
+FLOAT = re.compile(r'^-?(0|[1-9][0-9]*)\.[0-9]+$')
+
+DATE_FORMATS = [
+    ('%Y-%m-%d', datetime.date),
+    ('%Y-%m-%d %H:%M:%S', datetime.datetime),
+    ('%Y-%m-%d %H:%M:%S.%f', datetime.datetime)]
+
+
+def csv_value(text):
+    '''
+    Type of a CSV cell as detected by pyexcel: int, float, date or
+    datetime, keeping the numbers with leading zeros as str.
+    '''
+    if INT.match(text):
+        return int(text)
+
+    if FLOAT.match(text):
+        return float(text)
+
+    if text[:1].isdigit() and '-' in text:
+        for fmt, t in DATE_FORMATS:
+            try:
+                value = datetime.datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            return value.date() if t is datetime.date else value
+
+    return text
+
+
+def csv_rows(file_name, encoding='utf-8-sig', delimiter=','):
+    with open(file_name, encoding=encoding, newline='') as f:
+        for row in csv.reader(f, delimiter=delimiter):
+            yield [csv_value(v) for v in row]
+
+
+def open_workbook(file_name):
+    import openpyxl
+
+    return openpyxl.load_workbook(file_name, read_only=True, data_only=True)
+
+
+def worksheet_rows(ws):
+    for row in ws.iter_rows():
+        yield ['' if c.value is None else c.value for c in row]
+
+
+def xlsx_rows(file_name, sheet_name=None):
+    wb = open_workbook(file_name)
+
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.worksheets[0]
+
+        for row in worksheet_rows(ws):
+            yield row
+    finally:
+        wb.close()
+
+
+def records(rows, columns=None, types=None):
+    '''
+    Yield the rows after the header as dicts.
+    rows = iterable of lists, the first one is the header
+    columns = names of the first columns, e.g.: keycorrection.jcr_columns_names
+    types = {column name: function} applied to the non-empty values
+    '''
+    rows = iter(rows)
+
+    header = [str(h) for h in next(rows, [])]
+
+    # Key correction
+    for i, k in enumerate((columns or [])[:len(header)]):
+        header[i] = k
+
+    types = types or {}
+
+    for row in rows:
+
+        # empty rows, e.g.: formatted rows at the end of a sheet
+        if all(v == '' for v in row):
+            continue
+
+        row = list(row[:len(header)]) + [''] * (len(header) - len(row))
+
+        rec = dict(zip(header, row))
+
+        for k, t in types.items():
+            if k in rec and rec[k] != '':
+                rec[k] = t(rec[k])
+
+        yield rec
+
+
+def read_rows(file_name, columns=None, types=None, sheet_name=None,
+              encoding='utf-8-sig', delimiter=',', cache=False):
+    '''
+    Yield the records of a .csv file or of a sheet of a .xlsx file,
+    the first sheet when sheet_name is None.
+    cache = True to keep the parsed records in data/cache/ (sheet_cache)
+    '''
+    def parse():
+        if file_name.lower().endswith('.csv'):
+            rows = csv_rows(file_name, encoding, delimiter)
+        else:
+            rows = xlsx_rows(file_name, sheet_name)
+
+        return records(rows, columns, types)
+
+    if cache:
+        return sheet_cache.cached(
+            file_name, parse,
+            columns=columns, types=types, sheet_name=sheet_name,
+            encoding=encoding, delimiter=delimiter)
+
+    return parse()
+
+
+def read_sheets(file_name, sheet_names, columns=None, types=None, cache=False):
+    '''
+    Yield (sheet_name, records) of the sheets of a .xlsx file, the file
+    is opened once, and only when a sheet is not in the cache. The
+    records of a sheet must be read before the next sheet.
+    '''
+    wb = None
+
+    try:
+        for sheet_name in sheet_names:
+
+            def parse(sheet_name=sheet_name):
+                nonlocal wb
+                if wb is None:
+                    wb = open_workbook(file_name)
+
+                return records(worksheet_rows(wb[sheet_name]), columns, types)
+
+            if cache:
+                # same key as read_rows() of the sheet
+                yield sheet_name, sheet_cache.cached(
+                    file_name, parse,
+                    columns=columns, types=types, sheet_name=sheet_name,
+                    encoding='utf-8-sig', delimiter=',')
+            else:
+                yield sheet_name, parse()
+    finally:
+        if wb is not None:
+            wb.close()
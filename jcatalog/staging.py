@@ -0,0 +1,198 @@
+# coding: utf-8
+'''
+Full reload of a collection through a staging collection.
+
+The documents are written in <collection>_staging, without indexes and
+with a relaxed write concern. Then the indexes of the model are built
+and the staging collection is renamed over the live one
+(renameCollection with dropTarget is atomic), so the live collection is
+never empty or half loaded.
+
+With a key, a document of the live collection found again by its key
+keeps its _id, creation_date and the fields written by the matches
+(match.links), and keeps updated_at when the fields read by the matches
+did not change: after a reload the Links and the incremental matches
+(match.incremental) see only the journals that really changed.
+
+Before the swap the staging collection is compared with the live one: a
+load with less than MIN_RATIO of the live documents (e.g.: a truncated
+sheet, a missing file) is not swapped in, unless min_ratio=None.
+
+e.g.:
+    stage = staging.collection(models.Scopus)
+    count = staging.insert(models.Scopus, stage, docs, key=staging.field_key(['issn_list']))
+    staging.swap(models.Scopus, stage, count)
+'''
+import logging
+import datetime
+import hashlib
+import json
+
+from pymongo import IndexModel
+from pymongo.write_concern import WriteConcern
+
+logger = logging.getLogger(__name__)
+
+
+# acknowledged by the primary, not waiting for the journal
+RELAXED = WriteConcern(w=1, j=False)
+
+# smallest staging / live documents ratio swapped in
+MIN_RATIO = 0.9
+
+# fields read by the matches, updated_at is set when one of them changes
+MATCH_FIELDS = ['issn_list', 'title', 'title_country', 'title_country_key', 'country']
+
+
+def field_key(fields):
+    '''
+    Key of a document by the values of fields, None when all are empty.
+    '''
+    def key(doc):
+        values = tuple(
+            tuple(sorted(v)) if isinstance(v, list) else v
+            for v in (doc.get(f) for f in fields))
+        return values if any(values) else None
+
+    return key
+
+
+def match_digest(doc):
+    return hashlib.md5(json.dumps(
+        [doc.get(f) for f in MATCH_FIELDS], default=str).encode('utf-8')).hexdigest()
+
+
+def linked(name):
+    # fields written by match.links and match.clusters
+    return name != '_id' and (
+        name in ('linked_at', 'cluster_id') or
+        name.startswith(('is_', 'country_', 'score_')) or
+        name.endswith('_id'))
+
+
+def identities(model, key):
+    '''
+    Return {key: (_id, creation_date, updated_at, match digest, linked
+    fields)} of the live collection, the first document of a key.
+    '''
+    result = {}
+
+    for doc in model._get_collection().find():
+        k = key(doc)
+        if k is None or k in result:
+            continue
+        result[k] = (
+            doc['_id'],
+            doc.get('creation_date'),
+            doc.get('updated_at'),
+            match_digest(doc),
+            {n: v for n, v in doc.items() if linked(n)})
+
+    return result
+
+
+def collection(model):
+    '''
+    Empty staging collection of the model.
+    '''
+    live = model._get_collection()
+    name = live.name + '_staging'
+
+    live.database.drop_collection(name)
+
+    return live.database.create_collection(name, write_concern=RELAXED)
+
+
+def insert(model, stage, docs, batch_size=1000, key=None):
+    '''
+    Validate the documents with the model and insert them in batches,
+    return the number of documents.
+    key = function of a document returning its key (field_key()), to
+    keep the identity of the documents of the live collection
+    '''
+    live = identities(model, key) if key else {}
+
+    now = datetime.datetime.now()
+
+    count = 0
+    batch = []
+
+    for rec in docs:
+
+        k = key(rec) if key else None
+
+        if k in live:
+            _id, creation_date, updated_at, digest, fields = live.pop(k)
+
+            rec = dict(rec)
+            rec['id'] = _id
+            rec['creation_date'] = creation_date or now
+            if match_digest(rec) != digest:
+                rec['updated_at'] = now
+            elif updated_at:
+                rec['updated_at'] = updated_at
+            for n, v in fields.items():
+                rec.setdefault(n, v)
+
+        doc = model(**rec)
+        doc.validate()
+        batch.append(doc.to_mongo())
+
+        if len(batch) >= batch_size:
+            stage.insert_many(batch, ordered=False)
+            count += len(batch)
+            batch = []
+
+    if batch:
+        stage.insert_many(batch, ordered=False)
+        count += len(batch)
+
+    return count
+
+
+def indexes(model):
+    # the indexes of the model meta, as mongoengine ensure_indexes()
+    return [
+        IndexModel(spec['fields'], **{
+            k: v for k, v in spec.items() if k not in ('fields', 'cls')})
+        for spec in model._meta.get('index_specs') or []]
+
+
+def swap(model, stage, expected, min_ratio=MIN_RATIO):
+    '''
+    Build the indexes, verify the number of documents and replace the
+    live collection by the staging collection.
+    expected = number of documents inserted in staging
+    min_ratio = smallest ratio of the number of documents of the live
+    collection accepted, None to accept any number
+    '''
+    live = model._get_collection()
+
+    count = stage.count_documents({})
+
+    # written in staging by another process
+    if count != expected:
+        msg = u'%s: %d documents in staging, %d inserted, not swapped' % (
+            live.name, count, expected)
+        logger.error(msg)
+        raise ValueError(msg)
+
+    # a short read of the source
+    live_count = live.count_documents({})
+
+    if min_ratio is not None and count < live_count * min_ratio:
+        msg = u'%s: %d documents in staging, %d in the live collection, not swapped' % (
+            live.name, count, live_count)
+        logger.error(msg)
+        raise ValueError(msg)
+
+    if indexes(model):
+        stage.create_indexes(indexes(model))
+
+    stage.rename(live.name, dropTarget=True)
+
+    msg = u'%s: %d documents swapped in' % (live.name, count)
+    logger.info(msg)
+    print(msg)
+
+    return count
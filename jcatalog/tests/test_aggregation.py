@@ -0,0 +1,118 @@
+# coding: utf-8
+
+import unittest
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from accent_remover import title_key
+from match import aggregation
+from match import target_index
+
+
+def test_database():
+    # the aggregation stages run on the server, MongoDB 4.2 or later
+    try:
+        client = MongoClient(serverSelectionTimeoutMS=500)
+        client.admin.command('ping')
+    except PyMongoError:
+        return None
+
+    return client['jcatalog_test']
+
+
+DB = test_database()
+
+
+def fake_model(name):
+
+    class FakeModel(object):
+
+        _class_name = name
+
+        @classmethod
+        def _get_collection(cls):
+            return DB[name.lower()]
+
+        @classmethod
+        def _get_collection_name(cls):
+            return name.lower()
+
+    return FakeModel
+
+
+def journal(_id, issn_list, title, country='Brazil', **fields):
+    title_country = '%s-%s' % (title.lower(), country.lower())
+    doc = {
+        '_id': _id,
+        'issn_list': issn_list,
+        'title': title,
+        'title_key': title_key(title),
+        'country': country,
+        'title_country': title_country,
+        'title_country_key': title_key(title_country)}
+    doc.update(fields)
+    return doc
+
+
+'''
+Links of the aggregation engine and of the index engine
+'''
+@unittest.skipIf(DB is None, 'MongoDB is not available')
+class AggregationTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.scielo = fake_model('Scielo')
+        self.scopus = fake_model('Scopus')
+
+        DB.scopus.insert_many([
+            journal('t1', ['0001-0001'], 'Journal A'),
+            journal('t2', ['0002-0002'], 'Journal B'),
+            journal('t3', ['0002-0002'], 'Other Journal'),
+            journal('t4', ['0009-0009'], 'Journal C')])
+
+        DB.scielo.insert_many([
+            journal(1, ['0001-0001'], 'Journal A', is_scopus=0),
+            journal(2, ['0005-0005', '0002-0002'], 'Journal B', is_scopus=0),
+            journal(3, ['0003-0003'], 'Journal C', is_scopus=0),
+            journal(4, ['0004-0004'], 'Journal D', is_scopus=0)])
+
+
+    def tearDown(self):
+
+        DB.client.drop_database(DB.name)
+
+
+    def test_same_links_as_index(self):
+
+        summary = aggregation.match(self.scielo, self.scopus, country=1)
+
+        index = target_index.TargetIndex.from_collection(self.scopus)
+
+        expected = {}
+        for doc in DB.scielo.find():
+            link = target_index.resolve(
+                index, doc['issn_list'], title=doc['title'],
+                title_country=doc['title_country'], country=1)
+            if link:
+                expected[doc['_id']] = (link['target_id'], link['country'])
+
+        result = {
+            d['_id']: (d['scopus_id'], d['country_scopus'])
+            for d in DB.scielo.find({'is_scopus': 1})}
+
+        self.assertEqual(expected, result)
+        self.assertEqual({'1.1': 1, '1.2': 1, '2': 1}, summary)
+
+
+    def test_temporary_collections_dropped(self):
+
+        aggregation.match(self.scielo, self.scopus, country=1)
+
+        self.assertEqual(
+            ['scielo', 'scopus'], sorted(DB.list_collection_names()))
+
+
+if __name__ == '__main__':
+    unittest.main()
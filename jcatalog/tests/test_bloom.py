@@ -0,0 +1,154 @@
+# coding: utf-8
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import bloom
+
+
+class FakeCursor(list):
+
+    def sort(self, field, direction):
+        return FakeCursor(sorted(self, key=lambda d: d[field]))
+
+
+class FakeCollection(object):
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection):
+        return FakeCursor(
+            {k: v for k, v in d.items() if k == '_id' or projection.get(k)}
+            for d in self.docs)
+
+
+class FakeModel(object):
+
+    _class_name = 'Scopus'
+
+    collection = None
+
+    @classmethod
+    def _get_collection(cls):
+        return cls.collection
+
+
+'''
+Bloom filter of ISSNs and titles
+'''
+class BloomFilterTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.bf = bloom.BloomFilter(1000)
+
+        for i in range(1000):
+            self.bf.add(bloom.issn_key('%04d-%04d' % (i, i)))
+
+        self.bf.add(bloom.title_bloom_key('Ciência & Saúde'))
+
+        self.tmp = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmp)
+
+
+    def test_no_false_negatives(self):
+
+        result = all(bloom.maybe_issn(self.bf, '%04d-%04d' % (i, i)) for i in range(1000))
+
+        self.assertEqual(True, result)
+
+
+    def test_false_positive_rate(self):
+
+        result = sum(bloom.maybe_issn(self.bf, '%04d-X%03d' % (i, i)) for i in range(10000))
+
+        self.assertLess(result, 100)
+
+
+    def test_title_key(self):
+
+        result = bloom.maybe_title(self.bf, 'CIENCIA and SAUDE')
+
+        self.assertEqual(True, result)
+
+
+    def test_save_and_load(self):
+
+        file_name = os.path.join(self.tmp, 'jcr.bloom')
+
+        self.bf.save(file_name, 1001)
+
+        bf, count = bloom.BloomFilter.load(file_name)
+
+        self.assertEqual(1001, count)
+        self.assertEqual(True, bloom.maybe_issn(bf, '0010-0010'))
+
+
+    def test_without_filter(self):
+
+        result = bloom.maybe_any(None, [], None)
+
+        self.assertEqual(True, result)
+
+
+
+'''
+Saved filter used while its ISSNs and titles did not change
+'''
+class StampTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp = tempfile.mkdtemp()
+        self.path = bloom.BLOOM_PATH
+        bloom.BLOOM_PATH = self.tmp
+
+        self.docs = [
+            {'_id': 2, 'issn_list': ['0002-0002'], 'title': 'Journal B'},
+            {'_id': 1, 'issn_list': ['0001-0001'], 'title': 'Journal A'}]
+
+        FakeModel.collection = FakeCollection(self.docs)
+
+        bloom.build(FakeModel)
+
+
+    def tearDown(self):
+
+        bloom.BLOOM_PATH = self.path
+        shutil.rmtree(self.tmp)
+
+
+    def test_loaded(self):
+
+        bf = bloom.load(FakeModel)
+
+        self.assertEqual(True, bloom.maybe_issn(bf, '0001-0001'))
+        self.assertEqual(False, bloom.maybe_issn(bf, '0003-0003'))
+
+
+    def test_used_after_country_backfill(self):
+
+        for doc in self.docs:
+            doc['country'] = 'Brazil'
+            doc['title_country'] = doc['title'].lower() + '-brazil'
+            doc['updated_at'] = '2020-01-01'
+
+        self.assertNotEqual(None, bloom.load(FakeModel))
+
+
+    def test_not_used_after_issn_update(self):
+
+        self.docs[0]['issn_list'].append('0003-0003')
+
+        self.assertEqual(None, bloom.load(FakeModel))
+
+
+if __name__ == "__main__":
+    unittest.main()
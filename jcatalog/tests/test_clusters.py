@@ -0,0 +1,91 @@
+# coding: utf-8
+
+import unittest
+from unittest import mock
+
+from match import clusters
+
+
+class FakeCollection(object):
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.ops = []
+
+    def aggregate(self, pipeline):
+        for d in self.docs:
+            result = dict(d)
+            result.setdefault('nfields', len(d))
+            yield result
+
+    def bulk_write(self, ops, ordered=True):
+        self.ops.extend(ops)
+
+        class Result(object):
+            modified_count = len(ops)
+
+        return Result()
+
+
+def fake_model(name, docs):
+    collection = FakeCollection(docs)
+
+    class FakeModel(object):
+
+        _class_name = name
+
+        @classmethod
+        def _get_collection(cls):
+            return collection
+
+    return FakeModel
+
+
+'''
+Links of the pairs saved through match.links
+'''
+class ClustersTest(unittest.TestCase):
+
+    def run_clusters(self, scielo, scopus, old):
+        saved = {}
+
+        def save(dbcol1, dbcol2, old, new, batch_size):
+            saved[(dbcol1._class_name, dbcol2._class_name)] = (old, new)
+            return {}
+
+        with mock.patch.object(clusters.models, 'Scielo', fake_model('Scielo', scielo)), \
+                mock.patch.object(clusters.models, 'Scopus', fake_model('Scopus', scopus)), \
+                mock.patch.object(clusters.links, 'load', return_value=old), \
+                mock.patch.object(clusters.links, 'save', side_effect=save):
+            clusters.clusters(pairs=[('Scielo', 'Scopus', 1)])
+
+        return saved[('Scielo', 'Scopus')]
+
+
+    def test_target_with_more_fields(self):
+
+        old, new = self.run_clusters(
+            [{'_id': 1, 'issn_list': ['0001-0001'], 'country': 'Brazil'}],
+            [{'_id': 10, 'issn_list': ['0001-0001'], 'country': 'Brazil', 'nfields': 3},
+             {'_id': 11, 'issn_list': ['0001-0001', '0002-0002'],
+              'country': 'Brazil', 'nfields': 9}],
+            {})
+
+        self.assertEqual(
+            {1: {'target_id': '11', 'stage': 'cluster', 'country': 'Brazil'}}, new)
+
+
+    def test_missing_pair_left_to_save(self):
+
+        old, new = self.run_clusters(
+            [{'_id': 1, 'issn_list': ['0001-0001'], 'country': 'Brazil'}],
+            [{'_id': 10, 'issn_list': ['0003-0003'], 'country': 'Brazil'}],
+            {1: {'target_id': '10', 'stage': '1.1', 'score': None, 'country': 'Brazil'}})
+
+        # links.save() removes the old link
+        self.assertEqual({}, new)
+        self.assertIn(1, old)
+
+
+if __name__ == '__main__':
+    unittest.main()
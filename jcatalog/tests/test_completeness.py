@@ -0,0 +1,37 @@
+# coding: utf-8
+
+import unittest
+
+from completeness import field_count
+
+
+'''
+Number of non-empty fields of a journal document
+'''
+class FieldCountTest(unittest.TestCase):
+
+    def test_empty_values(self):
+
+        rec = {'title': 'Revista', 'issn_list': ['1234-5678'], 'publisher': '',
+               'country': None, 'is_scopus': 0, 'subjects': []}
+
+        result = field_count(rec)
+
+        expected = 2
+
+        self.assertEqual(expected, result)
+
+    def test_stored_count_ignored(self):
+
+        rec = {'title': 'Revista', 'field_count': 10, 'is_scielo': 0,
+               'creation_date': '2018-01-01'}
+
+        result = field_count(rec)
+
+        expected = 1
+
+        self.assertEqual(expected, result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# coding: utf-8
+
+import unittest
+
+from transform import country_resolver
+
+
+class FakeCollection(object):
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection):
+        for d in self.docs:
+            if d.get('country') not in query['country']['$nin']:
+                yield d
+
+
+def source(name, docs):
+    return type(name, (object,), {
+        '_class_name': name,
+        '_get_collection': classmethod(lambda cls: FakeCollection(docs))})
+
+
+'''
+Country of the journals by ISSN from other Data Sets
+'''
+class CountryResolverTest(unittest.TestCase):
+
+    def setUp(self):
+
+        sources = [
+            source('Scielo', [
+                {'_id': 1, 'issn_list': ['0001-0001'], 'country': 'Brazil'},
+                {'_id': 2, 'issn_list': ['0004-0004'], 'country': ''}]),
+            source('Scopus', [
+                {'_id': 1, 'issn_list': ['0001-0001', '0002-0002'], 'country': 'Chile'},
+                {'_id': 2, 'issn_list': ['0004-0004'], 'country': 'Peru'}]),
+            source('Scimago', [
+                {'_id': 1, 'issn_list': ['0001-0001', '0003-0003'], 'country': 'Spain'},
+                {'_id': 2, 'issn_list': ['0002-0002'], 'country': 'Spain'}])]
+
+        self.countries = country_resolver.issn_countries(sources)
+
+
+    def test_scielo_first(self):
+
+        result = country_resolver.resolve(self.countries, ['0001-0001'])
+
+        self.assertEqual(('Brazil', 'Scielo'), result)
+
+
+    def test_scopus_before_scimago(self):
+
+        result = country_resolver.resolve(self.countries, ['0002-0002'])
+
+        self.assertEqual(('Chile', 'Scopus'), result)
+
+
+    def test_source_without_country(self):
+
+        result = country_resolver.resolve(self.countries, ['0004-0004'])
+
+        self.assertEqual(('Peru', 'Scopus'), result)
+
+
+    def test_first_issn(self):
+
+        result = country_resolver.resolve(self.countries, ['0003-0003', '0001-0001'])
+
+        self.assertEqual(('Spain', 'Scimago'), result)
+
+
+    def test_not_found(self):
+
+        result = country_resolver.resolve(self.countries, ['9999-9999'])
+
+        self.assertEqual(None, result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+# coding: utf-8
+
+import unittest
+
+from dedup import dedup, row_hash
+
+
+'''
+Removal of duplicate records
+'''
+class DedupTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.records = [
+            {'issn': '0001-0001', 'title': 'Revista A'},
+            {'title': 'Revista A', 'issn': '0001-0001'},
+            {'issn': '0002-0002', 'title': 'Revista B'},
+            {'issn': '0001-0001', 'title': 'Revista A'},
+            {'issn': '0002-0002', 'title': 'Revista B2'}]
+
+    def test_dedup(self):
+
+        result = list(dedup(self.records))
+
+        expected = [self.records[0], self.records[2], self.records[4]]
+
+        self.assertEqual(expected, result)
+
+    def test_dedup_key(self):
+
+        result = list(dedup(self.records, key=lambda r: r['issn']))
+
+        expected = [self.records[0], self.records[2]]
+
+        self.assertEqual(expected, result)
+
+    def test_row_hash_key_order(self):
+
+        result = row_hash(self.records[0]) == row_hash(self.records[1])
+
+        self.assertTrue(result)
+
+
+if __name__ == '__main__':
+    unittest.main()
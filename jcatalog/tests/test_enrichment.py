@@ -0,0 +1,150 @@
+# coding: utf-8
+
+import unittest
+
+from transform import enrichment
+
+
+class FakeCollection(object):
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+        self.ops = []
+
+    def find(self, query, projection):
+        self.queries.append(query)
+
+        for d in self.docs:
+            if '_id' in query and d['_id'] not in query['_id']['$in']:
+                continue
+            if any(k != '_id' and k not in d for k in query):
+                continue
+            result = {'_id': d['_id']}
+            result.update({k: d[k] for k in projection if k in d})
+            yield result
+
+    def bulk_write(self, ops, ordered=True):
+        self.ops.extend(ops)
+
+        class Result(object):
+            modified_count = len(ops)
+
+        return Result()
+
+
+class FakeModel(object):
+
+    _class_name = 'Scielo'
+
+    collection = None
+
+    @classmethod
+    def _get_collection(cls):
+        return cls.collection
+
+
+'''
+Updates of the rows of a journal merged in one
+'''
+class MergeTest(unittest.TestCase):
+
+    def test_push(self):
+
+        into = enrichment.merge({}, {'$push': {'citations': 1}})
+        enrichment.merge(into, {'$push': {'citations': 2}})
+
+        self.assertEqual({'$push': {'citations': {'$each': [1, 2]}}}, into)
+
+
+    def test_each(self):
+
+        into = enrichment.merge({}, {'$addToSet': {'indexes': {'$each': ['a', 'b']}}})
+        enrichment.merge(into, {'$addToSet': {'indexes': 'c'}})
+
+        self.assertEqual({'$addToSet': {'indexes': {'$each': ['a', 'b', 'c']}}}, into)
+
+
+    def test_set_last_wins(self):
+
+        into = enrichment.merge({}, {'$set': {'is_wos': 0, 'a': 1}})
+        enrichment.merge(into, {'$set': {'is_wos': 1}, '$push': {'x': 1}})
+
+        self.assertEqual(
+            {'$set': {'is_wos': 1, 'a': 1}, '$push': {'x': {'$each': [1]}}}, into)
+
+
+'''
+Rows of a sheet added to the journals
+'''
+class EnrichTest(unittest.TestCase):
+
+    def setUp(self):
+
+        FakeModel.collection = FakeCollection([
+            {'_id': 1, 'issn_scielo': '0001-0001', 'issn_list': ['0001-0001', '0009-0009'],
+             'title_country_key': 'a-brazil', 'docs': {'n': 1}},
+            {'_id': 2, 'issn_scielo': '0002-0002', 'issn_list': ['0002-0002', '0009-0009'],
+             'title_country_key': 'b-brazil'},
+            {'_id': 3, 'issn_scielo': '0003-0003', 'issn_list': ['0003-0003']}])
+
+        self.keys = [('issn', 'issn_list'), ('title_country', 'title_country_key')]
+
+
+    def test_key_fallback(self):
+
+        rows = [
+            {'issn': '0001-0001'},
+            # more than one by ISSN, one by title and country
+            {'issn': '0009-0009', 'title_country': 'b-brazil'}]
+
+        result = enrichment.enrich(
+            FakeModel, rows, self.keys, lambda rec, doc: {'$set': {'x': 1}})
+
+        self.assertEqual(2, result['matched'])
+        self.assertEqual(
+            [1, 2], [op._filter['_id'] for op in FakeModel.collection.ops])
+
+
+    def test_ambiguous_and_not_found(self):
+
+        rows = [
+            {'issn': '0009-0009', 'title_country': 'z-brazil'},
+            {'issn': '9999-9999'}]
+
+        result = enrichment.enrich(
+            FakeModel, rows, self.keys, lambda rec, doc: {'$set': {'x': 1}})
+
+        self.assertEqual(
+            {'matched': 0, 'ambiguous': 1, 'not found': 1, 'updated': 0}, result)
+
+
+    def test_fields_of_the_matched_journals(self):
+
+        docs = []
+
+        def update(rec, doc):
+            docs.append(dict(doc))
+
+        enrichment.enrich(
+            FakeModel, [{'issn': '0001-0001'}], self.keys, update, fields=['docs'])
+
+        self.assertEqual([{'_id': 1, 'docs': {'n': 1}}], docs)
+        self.assertEqual({'_id': {'$in': [1]}}, FakeModel.collection.queries[-1])
+
+
+    def test_group(self):
+
+        rows = [{'issn': '0003-0003', 'n': 1}, {'issn': '0003-0003', 'n': 2}]
+
+        result = enrichment.enrich(
+            FakeModel, rows, self.keys,
+            lambda rec, doc: {'$push': {'citations': rec['n']}}, group=True)
+
+        self.assertEqual(1, result['updated'])
+        self.assertEqual(
+            {'$push': {'citations': {'$each': [1, 2]}}}, FakeModel.collection.ops[0]._doc)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+# coding: utf-8
+
+import unittest
+import datetime
+from unittest import mock
+
+from match import incremental
+
+
+WATERMARK = datetime.datetime(2020, 1, 1)
+BEFORE = datetime.datetime(2019, 1, 1)
+AFTER = datetime.datetime(2021, 1, 1)
+
+
+def matches(doc, query):
+    # the operators of the raw filters of match.incremental
+    for k, v in query.items():
+        if k == '$or':
+            if not any(matches(doc, q) for q in v):
+                return False
+        elif isinstance(v, dict):
+            value = doc.get(k)
+            for op, arg in v.items():
+                if op == '$gt' and not (value is not None and value > arg):
+                    return False
+                if op == '$lte' and not (value is not None and value <= arg):
+                    return False
+                if op == '$in':
+                    values = value if isinstance(value, list) else [value]
+                    if not any(i in arg for i in values):
+                        return False
+        elif doc.get(k) != v:
+            return False
+
+    return True
+
+
+class FakeCollection(object):
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return [dict(d) for d in self.docs if matches(d, query)]
+
+    def count_documents(self, query):
+        return len(self.find(query))
+
+    def aggregate(self, pipeline):
+        query = pipeline[0]['$match']
+        for d in self.find(query):
+            d['nfields'] = len(d)
+            yield d
+
+
+class FakeQuery(object):
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def count(self):
+        return len(self.docs)
+
+
+def fake_model(name, docs):
+    collection = FakeCollection(docs)
+
+    class FakeModel(object):
+
+        _class_name = name
+
+        @classmethod
+        def _get_collection(cls):
+            return collection
+
+        @classmethod
+        def objects(cls, creation_date__lte=None):
+            return FakeQuery([
+                d for d in collection.docs
+                if creation_date__lte is None or d['creation_date'] <= creation_date__lte])
+
+    return FakeModel
+
+
+def journal(_id, issn_list, creation_date=BEFORE, updated_at=None, **fields):
+    doc = {
+        '_id': _id,
+        'issn_list': issn_list,
+        'title': 'journal %s' % _id,
+        'country': 'Brazil',
+        'creation_date': creation_date}
+    if updated_at:
+        doc['updated_at'] = updated_at
+    doc.update(fields)
+    return doc
+
+
+'''
+Raw filter of the changed documents
+'''
+class ChangedSinceTest(unittest.TestCase):
+
+    def test_created_or_updated_after(self):
+
+        docs = [
+            journal(1, [], creation_date=BEFORE),
+            journal(2, [], creation_date=AFTER),
+            journal(3, [], creation_date=BEFORE, updated_at=AFTER)]
+
+        self.assertEqual(
+            [2, 3],
+            [d['_id'] for d in docs if matches(d, incremental.changed_since(WATERMARK))])
+
+
+'''
+Documents of DataSet1 evaluated again
+'''
+class RematchTest(unittest.TestCase):
+
+    def rematch(self, scielo, scopus, edges):
+        saved = {}
+
+        def save(dbcol1, dbcol2, old, new, batch_size):
+            saved['old'] = old
+            saved['new'] = new
+            return {}
+
+        with mock.patch.object(incremental.links, 'load', return_value=edges), \
+                mock.patch.object(incremental.links, 'save', side_effect=save), \
+                mock.patch.object(incremental.bloom, 'load', return_value=None):
+            summary = incremental.rematch(
+                fake_model('Scielo', scielo), fake_model('Scopus', scopus),
+                WATERMARK, len(scopus))
+
+        return summary, saved['old'], saved['new']
+
+
+    def test_changed_documents_only(self):
+
+        scopus = [
+            journal('t1', ['0001-0001']),
+            # its ISSN changed after the watermark
+            journal('t2', ['0002-0002'], updated_at=AFTER)]
+
+        scielo = [
+            # not changed, linked to an unchanged target
+            journal(1, ['0001-0001'], scopus_id='t1'),
+            # created after the watermark
+            journal(2, ['0001-0001'], creation_date=AFTER),
+            # shares an ISSN with a changed target
+            journal(3, ['0002-0002'])]
+
+        edges = {1: {'target_id': 't1', 'stage': '1.1', 'score': None, 'country': ''}}
+
+        summary, old, new = self.rematch(scielo, scopus, edges)
+
+        self.assertEqual(2, summary['evaluated'])
+        self.assertEqual({}, old)
+        self.assertEqual(['t1', 't2'], [new[2]['target_id'], new[3]['target_id']])
+
+
+    def test_deleted_target(self):
+
+        scopus = [journal('t1', ['0001-0001'])]
+
+        scielo = [journal(1, ['0009-0009'], scopus_id='t2')]
+
+        edges = {1: {'target_id': 't2', 'stage': '1.1', 'score': None, 'country': ''}}
+
+        with mock.patch.object(incremental.links, 'load', return_value=edges), \
+                mock.patch.object(incremental.links, 'save', return_value={}) as save, \
+                mock.patch.object(incremental.bloom, 'load', return_value=None):
+            incremental.rematch(
+                fake_model('Scielo', scielo), fake_model('Scopus', scopus), WATERMARK, 2)
+
+        dbcol1, dbcol2, old, new, batch_size = save.call_args[0]
+
+        # the link to the deleted document is removed
+        self.assertEqual([1], list(old))
+        self.assertEqual({}, new)
+
+
+'''
+Full or incremental match of a pair
+'''
+class MatchIncrementalTest(unittest.TestCase):
+
+    def match_incremental(self, scielo, watermark):
+        wm = mock.Mock(watermark=watermark, target_count=1)
+
+        watermarks = mock.Mock()
+        watermarks.objects.return_value.first.return_value = wm
+
+        with mock.patch.object(incremental.models, 'Matchwatermark', watermarks), \
+                mock.patch.object(incremental.matches, 'match', return_value={'full': 1}), \
+                mock.patch.object(incremental, 'rematch', return_value={'evaluated': 1}):
+            summary = incremental.match_incremental(
+                fake_model('Scielo', scielo),
+                fake_model('Scopus', [journal('t1', ['0001-0001'])]))
+
+        self.assertTrue(wm.save.called)
+
+        return summary
+
+
+    def test_first_run(self):
+
+        self.assertEqual({'full': 1}, self.match_incremental([journal(1, [])], None))
+
+
+    def test_few_changes(self):
+
+        scielo = [journal(1, []), journal(2, []), journal(3, [], creation_date=AFTER)]
+
+        self.assertEqual({'evaluated': 1}, self.match_incremental(scielo, WATERMARK))
+
+
+    def test_reloaded(self):
+
+        scielo = [journal(i, [], creation_date=AFTER) for i in range(3)]
+
+        self.assertEqual({'full': 1}, self.match_incremental(scielo, WATERMARK))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+# coding: utf-8
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from match import links
+
+
+class FakeCollection(object):
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection):
+        ids = query['_id']['$in']
+        return [dict(d) for d in self.docs if d['_id'] in ids]
+
+
+def fake_model(name, docs):
+    collection = FakeCollection(docs)
+
+    class FakeModel(object):
+
+        _class_name = name
+
+        @classmethod
+        def _get_collection(cls):
+            return collection
+
+    return FakeModel
+
+
+def link(target_id, stage='1.1'):
+    return {'target_id': target_id, 'stage': stage, 'score': None, 'country': 'Brazil'}
+
+
+'''
+Dry run of the links against a reloaded DataSet2
+'''
+class DiffTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.tmp, 'diff.jsonl')
+
+        self.scielo = fake_model('Scielo', [])
+        self.scopus = fake_model('Scopus', [
+            {'_id': 'a', 'issn_list': ['0001-0001']},
+            {'_id': 'b', 'issn_list': ['0002-0002']},
+            {'_id': 'c', 'title_country_key': 'journal c brazil'}])
+
+        # the same journals with other _ids, e.g. a staging collection
+        self.staging = FakeCollection([
+            {'_id': 'x', 'issn_list': ['0001-0001']},
+            {'_id': 'y', 'issn_list': ['0003-0003']},
+            {'_id': 'z', 'title_country_key': 'journal c brazil'}])
+
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmp)
+
+
+    def test_compared_by_target_key(self):
+
+        old = {1: link('a'), 2: link('b'), 3: link('c', '2')}
+        new = {1: link('x'), 2: link('y'), 3: link('z', '2')}
+
+        summary = links.diff(
+            self.scielo, self.scopus, old, new, self.file_name, target=self.staging)
+
+        with open(self.file_name) as f:
+            changes = [json.loads(line) for line in f]
+
+        self.assertEqual({'1.1': 1, 'unchanged': 2}, summary)
+        self.assertEqual(
+            [('changed', '2', '0002-0002', '0003-0003')],
+            [(c['change'], c['source_id'], c['old_key'], c['new_key']) for c in changes])
+
+
+    def test_removed(self):
+
+        summary = links.diff(self.scielo, self.scopus, {1: link('a')}, {}, self.file_name)
+
+        self.assertEqual({'removed': 1, 'unchanged': 0}, summary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# coding: utf-8
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import manifest
+
+
+'''
+Stages skipped when their inputs did not change
+'''
+class ManifestTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.tmp, 'journals.csv')
+        self.manifest_name = os.path.join(self.tmp, 'manifest.json')
+
+        with open(self.file_name, 'w') as f:
+            f.write('issn,title\n')
+
+        self.runs = []
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmp)
+
+    def load(self):
+
+        self.runs.append('load')
+        return len(self.runs)
+
+    def run_stage(self, deps=None):
+
+        return manifest.run(
+            'load:Journals', self.load,
+            files=[self.file_name],
+            deps=deps,
+            manifest=manifest.Manifest(self.manifest_name))
+
+    def test_unchanged_skipped(self):
+
+        self.run_stage()
+
+        result = self.run_stage()
+
+        expected = 1
+
+        self.assertEqual(expected, result)
+        self.assertEqual(['load'], self.runs)
+
+    def test_changed_file(self):
+
+        self.run_stage()
+
+        with open(self.file_name, 'a') as f:
+            f.write('0001-3765,Anais\n')
+
+        result = self.run_stage()
+
+        expected = 2
+
+        self.assertEqual(expected, result)
+
+    def test_changed_dependency(self):
+
+        self.run_stage(deps={'Scielo': 'a'})
+
+        result = self.run_stage(deps={'Scielo': 'b'})
+
+        expected = 2
+
+        self.assertEqual(expected, result)
+
+    def test_changed_output(self):
+
+        stamp = {'Journals': '10:a'}
+
+        for i in range(2):
+            manifest.run(
+                'load:Journals', self.load,
+                files=[self.file_name],
+                outputs={'Journals': lambda: stamp['Journals']},
+                manifest=manifest.Manifest(self.manifest_name))
+
+        # the collection was dropped after the load
+        stamp['Journals'] = '0:b'
+
+        result = manifest.run(
+            'load:Journals', self.load,
+            files=[self.file_name],
+            outputs={'Journals': lambda: stamp['Journals']},
+            manifest=manifest.Manifest(self.manifest_name))
+
+        expected = 2
+
+        self.assertEqual(expected, result)
+
+    def test_digests(self):
+
+        m = manifest.Manifest(self.manifest_name)
+
+        m.record('load:Scielo', deps={'a': 1})
+        m.record('update:Scielo:data/scielo/apc.xlsx', deps={'b': 1})
+        m.record('match:Scielo:Scopus', deps={'c': 1})
+        m.record('load:Scopus', deps={'d': 1})
+
+        result = sorted(m.digests('Scielo', kinds=('load', 'update')))
+
+        expected = ['load:Scielo', 'update:Scielo:data/scielo/apc.xlsx']
+
+        self.assertEqual(expected, result)
+
+
+if __name__ == '__main__':
+    unittest.main()
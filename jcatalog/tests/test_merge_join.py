@@ -0,0 +1,52 @@
+# coding: utf-8
+
+import unittest
+
+from match.merge_join import merge_join
+
+
+'''
+Join of two streams sorted by key
+'''
+class MergeJoinTest(unittest.TestCase):
+
+    def test_join(self):
+
+        left = [{'k': 'a', 'id': 1}, {'k': 'b', 'id': 2}, {'k': 'd', 'id': 3}]
+        right = [{'k': 'b', 'id': 10}, {'k': 'c', 'id': 11}, {'k': 'd', 'id': 12}]
+
+        result = [
+            (k, [d['id'] for d in l], [d['id'] for d in r])
+            for k, l, r in merge_join(left, right, 'k')]
+
+        self.assertEqual([('b', [2], [10]), ('d', [3], [12])], result)
+
+
+    def test_duplicate_keys(self):
+
+        left = [{'k': 'a', 'id': 1}, {'k': 'a', 'id': 2}, {'k': 'b', 'id': 3}]
+        right = [{'k': 'a', 'id': 10}, {'k': 'a', 'id': 11}, {'k': 'a', 'id': 12}]
+
+        result = [
+            (k, [d['id'] for d in l], [d['id'] for d in r])
+            for k, l, r in merge_join(left, right, 'k')]
+
+        self.assertEqual([('a', [1, 2], [10, 11, 12])], result)
+
+
+    def test_empty_left(self):
+
+        result = list(merge_join([], [{'k': 'a'}], 'k'))
+
+        self.assertEqual([], result)
+
+
+    def test_empty_right(self):
+
+        result = list(merge_join(iter([{'k': 'a'}]), iter([]), 'k'))
+
+        self.assertEqual([], result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+# coding: utf-8
+
+import unittest
+
+from match import minhash
+from match import target_index
+
+
+'''
+Similar titles by MinHash/LSH
+'''
+class TitleLSHTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.lsh = minhash.TitleLSH()
+
+        self.lsh.add('a1', 'Revista Brasileira de Zootecnia', 'brazil')
+        self.lsh.add('a2', 'Revista Brasileira de Entomologia', 'brazil')
+        self.lsh.add('a3', 'Revista Brasileira de Zootecnia', 'chile')
+
+
+    def test_punctuation_and_articles(self):
+
+        result = self.lsh.best('Revista Brasileira da Zootecnia.', 'brazil', 0.8)
+
+        self.assertEqual('a1', result[0])
+
+
+    def test_subtitle(self):
+
+        result = self.lsh.best(
+            'Revista Brasileira de Zootecnia: Brazilian Journal of Animal Science', 'brazil', 0.8)
+
+        self.assertEqual('a1', result[0])
+
+
+    def test_different_subtitles(self):
+
+        self.lsh.add('p1', 'Journal of Physics: Conference Series', 'united kingdom')
+
+        result = self.lsh.best('Journal of Physics: Condensed Matter', 'united kingdom', 0.9)
+
+        self.assertEqual(None, result)
+
+
+    def test_different_subtitles_similarity(self):
+
+        result = minhash.similarity(
+            'Journal of Physics: Conference Series', 'Journal of Physics: Condensed Matter')
+
+        self.assertLess(result, 0.9)
+
+
+    def test_other_country(self):
+
+        result = self.lsh.best('Revista Brasileira de Entomologia', 'chile', 0.8)
+
+        self.assertEqual(None, result)
+
+
+    def test_below_threshold(self):
+
+        result = self.lsh.best('Journal of Animal Science', 'brazil', 0.8)
+
+        self.assertEqual(None, result)
+
+
+'''
+Stage 3 of the match by similar title and country
+'''
+class FuzzyStageTest(unittest.TestCase):
+
+    def test_fuzzy_stage(self):
+
+        index = target_index.TargetIndex()
+        index.add('b1', [], title_country='ciencia rural-brazil', country='Brazil')
+        index.build_fuzzy()
+
+        result = target_index.resolve(
+            index, [], title_country='Ciência Rural: revista-brazil', country=1, fuzzy=0.8)
+
+        self.assertEqual('3', result['stage'])
+        self.assertEqual('b1', result['target_id'])
+        self.assertEqual(1.0, result['score'])
+
+
+    def test_fuzzy_stage_disabled(self):
+
+        index = target_index.TargetIndex()
+        index.add('b1', [], title_country='ciencia rural-brazil', country='Brazil')
+        index.build_fuzzy()
+
+        result = target_index.resolve(index, [], title_country='Ciência Rural: revista-brazil')
+
+        self.assertEqual(None, result)
+
+
+    def test_fuzzy_stage_different_subtitles(self):
+
+        index = target_index.TargetIndex()
+        index.add(
+            'p1', [], title_country='journal of physics: conference series-united kingdom',
+            country='United Kingdom')
+        index.build_fuzzy()
+
+        result = target_index.resolve(
+            index, [], title_country='Journal of Physics: Condensed Matter-United Kingdom',
+            country=1, fuzzy=0.9)
+
+        self.assertEqual(None, result)
+
+
+    def test_fuzzy_stage_hyphenated_country(self):
+
+        index = target_index.TargetIndex()
+        index.add('g1', [], title_country='revista medica-guinea-bissau', country='Guinea-Bissau')
+        index.build_fuzzy()
+
+        result = target_index.resolve(
+            index, [], title_country='Revista Médica.-Guinea-Bissau', country=1, fuzzy=0.8)
+
+        self.assertEqual('g1', result['target_id'])
+
+
+if __name__ == "__main__":
+    unittest.main()
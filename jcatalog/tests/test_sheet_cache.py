@@ -0,0 +1,89 @@
+# coding: utf-8
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import sheet_cache
+from sheet_reader import read_rows
+from transform import source_loader
+
+
+'''
+Parsed sheets read back from the cache
+'''
+class SheetCacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.tmp, 'journals.csv')
+
+        with open(self.file_name, 'w', encoding='utf-8') as f:
+            f.write('ISSN,Title,Cites,Date\n')
+            f.write('0001-3765,Anais,1234,2018-02-06\n')
+            f.write('12345678,Revista,0,\n')
+            f.write('01234567,Ciência,12,\n')
+
+        self.cache_path = sheet_cache.CACHE_PATH
+        self.group_size = sheet_cache.GROUP_SIZE
+
+        sheet_cache.CACHE_PATH = os.path.join(self.tmp, 'cache')
+        sheet_cache.GROUP_SIZE = 2
+
+    def tearDown(self):
+
+        sheet_cache.CACHE_PATH = self.cache_path
+        sheet_cache.GROUP_SIZE = self.group_size
+
+        shutil.rmtree(self.tmp)
+
+    def test_cached_records(self):
+
+        expected = list(read_rows(self.file_name, columns=['issn'], types={'issn': str}))
+
+        list(read_rows(self.file_name, columns=['issn'], types={'issn': str}, cache=True))
+
+        self.assertEqual(1, len(os.listdir(sheet_cache.CACHE_PATH)))
+
+        result = list(read_rows(self.file_name, columns=['issn'], types={'issn': str}, cache=True))
+
+        self.assertEqual(expected, result)
+
+    def test_new_mapping(self):
+
+        list(read_rows(self.file_name, columns=['issn'], cache=True))
+
+        result = list(read_rows(self.file_name, columns=['issn', 'title'], cache=True))
+
+        expected = 'Anais'
+
+        self.assertEqual(expected, result[0]['title'])
+        self.assertEqual(2, len(os.listdir(sheet_cache.CACHE_PATH)))
+
+    def test_records_changed_by_prepare(self):
+
+        def prepare(rec):
+            # as scimago_prepare(): a column moved to another field
+            rec['cites_list'] = [rec.pop('cites')]
+            return rec
+
+        spec = {
+            'columns': ['issn', 'title', 'cites', 'date'],
+            'types': {'issn': str},
+            'prepare': prepare}
+
+        expected = [
+            rec for rec, years in source_loader.parse_rows(spec, self.file_name, '2018', {})]
+
+        # read from the cache
+        result = [
+            rec for rec, years in source_loader.parse_rows(spec, self.file_name, '2018', {})]
+
+        self.assertEqual(expected, result)
+        self.assertEqual([1234], result[0]['cites_list'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# coding: utf-8
+
+import os
+import shutil
+import datetime
+import tempfile
+import unittest
+
+from sheet_reader import read_rows
+
+
+'''
+Records of a CSV sheet
+'''
+class ReadRowsTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.tmp, 'journals.csv')
+
+        with open(self.file_name, 'w', encoding='utf-8') as f:
+            f.write('ISSN,Title,Cites,JIF,Date\n')
+            f.write('0001-3765,Anais,1234,0.95,2018-02-06\n')
+            f.write(',,,,\n')
+            f.write('12345678,Revista,0,1.5,\n')
+            f.write('01234567,Ciência,12,,\n')
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmp)
+
+    def test_records(self):
+
+        result = list(read_rows(self.file_name, columns=['issn', 'title']))
+
+        expected = [
+            {'issn': '0001-3765', 'title': 'Anais', 'Cites': 1234, 'JIF': 0.95,
+             'Date': datetime.date(2018, 2, 6)},
+            {'issn': 12345678, 'title': 'Revista', 'Cites': 0, 'JIF': 1.5, 'Date': ''},
+            {'issn': '01234567', 'title': 'Ciência', 'Cites': 12, 'JIF': '', 'Date': ''}]
+
+        self.assertEqual(expected, result)
+
+    def test_types(self):
+
+        result = [r['issn'] for r in read_rows(
+            self.file_name, columns=['issn'], types={'issn': str})]
+
+        expected = ['0001-3765', '12345678', '01234567']
+
+        self.assertEqual(expected, result)
+
+
+if __name__ == '__main__':
+    unittest.main()
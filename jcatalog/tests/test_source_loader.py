@@ -0,0 +1,169 @@
+# coding: utf-8
+
+import unittest
+
+from transform import source_loader
+
+
+'''
+ISSNs of a sheet cell
+'''
+class IssnValuesTest(unittest.TestCase):
+
+    def test_list(self):
+
+        result = source_loader.issn_values('ISSN 00344567, 1234567X')
+
+        self.assertEqual(['0034-4567', '1234-567X'], result)
+
+
+    def test_number(self):
+
+        result = source_loader.issn_values(345678)
+
+        self.assertEqual(['0034-5678'], result)
+
+
+    def test_formatted_and_invalid(self):
+
+        result = source_loader.issn_values('0034-4567,-,')
+
+        self.assertEqual(['0034-4567'], result)
+
+
+'''
+Indicators moved to the year subdocument
+'''
+class PivotTest(unittest.TestCase):
+
+    def test_year_of_the_file(self):
+
+        spec = {'indicators': [(float, 'sjr'), (None, 'rank')]}
+        rec = {'title': 'X', 'sjr': '1.5', 'rank': 3}
+
+        years = source_loader.pivot(rec, spec, 2016)
+
+        self.assertEqual(['2016'], years)
+        self.assertEqual({'title': 'X', '2016': {'sjr': 1.5, 'rank': 3}}, rec)
+
+
+    def test_indicator_years(self):
+
+        spec = {
+            'indicators': [(float, 'citescore')],
+            'indicator_years': ['2014', '2015', '2016']}
+        rec = {'citescore_2014': 1, 'citescore_2016': '2.5'}
+
+        years = source_loader.pivot(rec, spec, None)
+
+        self.assertEqual(['2014', '2016'], years)
+        self.assertEqual({'2014': {'citescore': 1.0}, '2016': {'citescore': 2.5}}, rec)
+
+
+    def test_convert(self):
+
+        spec = {
+            'indicators': [(int, 'total_cites')],
+            'convert': source_loader.jcr_convert}
+        rec = {'total_cites': '1,234'}
+
+        source_loader.pivot(rec, spec, '2016')
+
+        self.assertEqual({'2016': {'total_cites': 1234}}, rec)
+
+
+'''
+Rows of the same journal merged across files
+'''
+class ConsolidateTest(unittest.TestCase):
+
+    def parsed(self):
+        return [
+            ('scie', [
+                ({'issn_list': ['0001-0001'], 'lower_title': 'a',
+                  'citation_database': ['SCIE'], '2016': {'jif': 1}}, ['2016']),
+                ({'issn_list': ['0002-0002'], 'lower_title': 'b',
+                  'citation_database': ['SCIE'], '2016': {'jif': 2}}, ['2016'])]),
+            ('ssci', [
+                ({'issn_list': ['0003-0003'], 'lower_title': 'a',
+                  'citation_database': ['SSCI'], '2016': {'jif': 9}}, ['2016'])])]
+
+
+    def test_merge_by_any_key(self):
+
+        spec = {'keys': ['issn_list', 'lower_title'], 'list_fields': ['citation_database']}
+
+        result = source_loader.consolidate(spec, self.parsed())
+
+        self.assertEqual(2, len(result))
+        self.assertEqual(['0001-0001', '0003-0003'], result[0]['issn_list'])
+        self.assertEqual(['SCIE', 'SSCI'], result[0]['citation_database'])
+
+
+    def test_last_year(self):
+
+        spec = {'keys': ['issn_list', 'lower_title']}
+
+        result = source_loader.consolidate(spec, self.parsed())
+
+        self.assertEqual({'jif': 9}, result[0]['2016'])
+
+
+    def test_first_year(self):
+
+        spec = {'keys': ['issn_list', 'lower_title'], 'first_year': True}
+
+        result = source_loader.consolidate(spec, self.parsed())
+
+        self.assertEqual({'jif': 1}, result[0]['2016'])
+
+
+    def test_merged_journal_found_by_new_key(self):
+
+        spec = {'keys': ['issn_list']}
+        parsed = [('f', [
+            ({'issn_list': ['0001-0001']}, []),
+            ({'issn_list': ['0001-0001', '0009-0009']}, []),
+            ({'issn_list': ['0009-0009']}, [])])]
+
+        result = source_loader.consolidate(spec, parsed)
+
+        self.assertEqual(1, len(result))
+        self.assertEqual(['0001-0001', '0009-0009'], result[0]['issn_list'])
+
+
+'''
+Digest of a spec in the manifest of the loads
+'''
+class SpecDigestTest(unittest.TestCase):
+
+    def test_same_spec(self):
+
+        result = source_loader.spec_digest(dict(source_loader.JCR))
+
+        self.assertEqual(source_loader.spec_digest(source_loader.JCR), result)
+
+
+    def test_changed_mapping(self):
+
+        spec = dict(source_loader.SCOPUS)
+        spec['columns'] = list(spec['columns'])
+        spec['columns'][0] = 'other'
+
+        result = source_loader.spec_digest(spec)
+
+        self.assertNotEqual(source_loader.spec_digest(source_loader.SCOPUS), result)
+
+
+    def test_changed_prepare(self):
+
+        spec = dict(source_loader.CWTS)
+        spec['prepare'] = lambda rec: rec
+
+        result = source_loader.spec_digest(spec)
+
+        self.assertNotEqual(source_loader.spec_digest(source_loader.CWTS), result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+# coding: utf-8
+
+import unittest
+import datetime
+
+import staging
+
+
+class FakeCollection(object):
+
+    def __init__(self, name, docs=None):
+        self.name = name
+        self.docs = list(docs or [])
+        self.batches = []
+        self.indexes = []
+        self.renamed = None
+
+    def insert_many(self, docs, ordered=True):
+        self.batches.append(len(docs))
+        self.docs.extend(docs)
+
+    def find(self):
+        return [dict(d) for d in self.docs]
+
+    def count_documents(self, query):
+        return len(self.docs)
+
+    def create_indexes(self, indexes):
+        self.indexes.extend(indexes)
+
+    def rename(self, name, dropTarget=False):
+        self.renamed = (name, dropTarget)
+
+
+class FakeModel(object):
+
+    live = FakeCollection('journals')
+
+    _meta = {'index_specs': [{'fields': [('issn_list', 1)], 'cls': False}]}
+
+    def __init__(self, **rec):
+        self.rec = rec
+
+    def validate(self):
+        if 'title' not in self.rec:
+            raise ValueError('title is required')
+
+    def to_mongo(self):
+        return dict(self.rec)
+
+    @classmethod
+    def _get_collection(cls):
+        return cls.live
+
+
+'''
+Loads written in a staging collection and swapped in
+'''
+class StagingTest(unittest.TestCase):
+
+    def setUp(self):
+
+        FakeModel.live = FakeCollection('journals', [{}] * 10)
+
+        self.stage = FakeCollection('journals_staging')
+
+
+    def test_insert_batches(self):
+
+        count = staging.insert(
+            FakeModel, self.stage, ({'title': str(i)} for i in range(25)), batch_size=10)
+
+        self.assertEqual(25, count)
+        self.assertEqual([10, 10, 5], self.stage.batches)
+
+
+    def test_insert_validates(self):
+
+        with self.assertRaises(ValueError):
+            staging.insert(FakeModel, self.stage, [{'title': 'a'}, {'issn': 'b'}])
+
+
+    def test_swap(self):
+
+        count = staging.insert(FakeModel, self.stage, [{'title': str(i)} for i in range(10)])
+
+        staging.swap(FakeModel, self.stage, count)
+
+        self.assertEqual(('journals', True), self.stage.renamed)
+        self.assertEqual(1, len(self.stage.indexes))
+
+
+    def test_short_load_not_swapped(self):
+
+        count = staging.insert(FakeModel, self.stage, [{'title': str(i)} for i in range(5)])
+
+        with self.assertRaises(ValueError):
+            staging.swap(FakeModel, self.stage, count)
+
+        self.assertEqual(None, self.stage.renamed)
+
+
+    def test_short_load_accepted(self):
+
+        count = staging.insert(FakeModel, self.stage, [{'title': str(i)} for i in range(5)])
+
+        staging.swap(FakeModel, self.stage, count, min_ratio=None)
+
+        self.assertEqual(('journals', True), self.stage.renamed)
+
+
+    def test_count_mismatch_not_swapped(self):
+
+        staging.insert(FakeModel, self.stage, [{'title': str(i)} for i in range(10)])
+
+        with self.assertRaises(ValueError):
+            staging.swap(FakeModel, self.stage, 9)
+
+        self.assertEqual(None, self.stage.renamed)
+
+
+
+'''
+Documents found again by their key keep their identity
+'''
+class IdentityTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.created = datetime.datetime(2019, 1, 1)
+
+        FakeModel.live = FakeCollection('journals', [{
+            '_id': 'a',
+            'issn_list': ['0001-0001'],
+            'title': 'Journal',
+            'creation_date': self.created,
+            'is_scopus': 1,
+            'scopus_id': 't1',
+            'linked_at': self.created}])
+
+        self.stage = FakeCollection('journals_staging')
+
+
+    def insert(self, rec):
+
+        staging.insert(
+            FakeModel, self.stage, [rec], key=staging.field_key(['issn_list']))
+
+        return self.stage.docs[0]
+
+
+    def test_unchanged(self):
+
+        doc = self.insert({'issn_list': ['0001-0001'], 'title': 'Journal', 'sjr': 1})
+
+        self.assertEqual('a', doc['id'])
+        self.assertEqual(self.created, doc['creation_date'])
+        self.assertNotIn('updated_at', doc)
+        self.assertEqual(('t1', 1), (doc['scopus_id'], doc['is_scopus']))
+
+
+    def test_title_changed(self):
+
+        doc = self.insert({'issn_list': ['0001-0001'], 'title': 'New Journal'})
+
+        self.assertEqual('a', doc['id'])
+        self.assertIn('updated_at', doc)
+
+
+    def test_new_key(self):
+
+        doc = self.insert({'issn_list': ['0002-0002'], 'title': 'Journal'})
+
+        self.assertNotIn('id', doc)
+        self.assertNotIn('scopus_id', doc)
+
+
+if __name__ == "__main__":
+    unittest.main()
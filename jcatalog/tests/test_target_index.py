@@ -0,0 +1,123 @@
+# coding: utf-8
+
+import unittest
+
+from match import target_index
+
+
+'''
+Resolving match stages against the in memory index
+'''
+class TargetIndexResolveTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.index = target_index.TargetIndex()
+
+        self.index.add('a1', ['0001-0001'], title='Unique', country='Brazil', nfields=10)
+
+        self.index.add('b1', ['0002-0002'], title='Revista X', nfields=10)
+        self.index.add('b2', ['0002-0002'], title='Revista Y', nfields=12)
+
+        self.index.add('c1', ['0003-0003'], title='Same', nfields=10)
+        self.index.add('c2', ['0003-0003'], title='same', nfields=15)
+        self.index.add('c3', ['0003-0003', '0003-0003'], title='Other', nfields=20)
+
+        self.index.add('d1', [], title_country='revista z-brazil', country='Brazil')
+
+
+    def test_unique_issn(self):
+
+        result = target_index.resolve(self.index, ['9999-9999', '0001-0001'], country=1)
+
+        self.assertEqual('1.1', result['stage'])
+        self.assertEqual('a1', result['target_id'])
+        self.assertEqual('Brazil', result['country'])
+
+
+    def test_unique_issn_without_country_flag(self):
+
+        result = target_index.resolve(self.index, ['0001-0001'])
+
+        self.assertEqual('', result['country'])
+
+
+    def test_issn_and_title(self):
+
+        result = target_index.resolve(self.index, ['0002-0002'], title='REVISTA Y')
+
+        self.assertEqual('1.2', result['stage'])
+        self.assertEqual('b2', result['target_id'])
+        self.assertEqual(None, result['country'])
+
+
+    def test_issn_and_title_not_found_goes_to_next_stage(self):
+
+        result = target_index.resolve(
+            self.index, ['0002-0002'], title='Other', title_country='Revista Z-Brazil', country=1)
+
+        self.assertEqual('2', result['stage'])
+        self.assertEqual('d1', result['target_id'])
+
+
+    def test_title_compared_by_key(self):
+
+        result = target_index.resolve(self.index, ['0002-0002'], title='Revista  Ý')
+
+        self.assertEqual('b2', result['target_id'])
+
+
+    def test_title_country_compared_by_key(self):
+
+        self.index.add('e1', [], title_country='ciencia & saude-brazil', country='Brazil')
+
+        result = target_index.resolve(self.index, [], title_country='Ciência and Saúde-Brazil')
+
+        self.assertEqual('e1', result['target_id'])
+
+
+    def test_most_fields_tiebreak(self):
+
+        result = target_index.resolve(self.index, ['0003-0003'], title='Same')
+
+        self.assertEqual('1.2.1', result['stage'])
+        self.assertEqual('c3', result['target_id'])
+        self.assertEqual(True, result['save'])
+
+
+    def test_not_found(self):
+
+        result = target_index.resolve(self.index, ['9999-9999'], title='Nothing')
+
+        self.assertEqual(None, result)
+
+
+'''
+Title and country of a title_country
+'''
+class SplitTitleCountryTest(unittest.TestCase):
+
+    def test_split(self):
+
+        result = target_index.split_title_country('Revista-X-Brazil')
+
+        self.assertEqual(('revista-x', 'brazil'), result)
+
+
+    def test_hyphenated_country(self):
+
+        result = target_index.split_title_country(
+            'Revista Medica-Guinea-Bissau', ['brazil', 'guinea-bissau'])
+
+        self.assertEqual(('revista medica', 'guinea-bissau'), result)
+
+
+    def test_unknown_country(self):
+
+        result = target_index.split_title_country('Revista-Timor-Leste', ['brazil'])
+
+        self.assertEqual(('revista-timor', 'leste'), result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+# coding: utf-8
+
+import unittest
+
+from match.union_find import UnionFind
+
+
+'''
+Clustering journals by shared ISSNs
+'''
+class UnionFindTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.uf = UnionFind()
+
+        # A -> B by one ISSN, B -> C by other ISSN
+        self.uf.union(('scielo', 'a'), 'issn:0001-0001')
+        self.uf.union(('jcr', 'b'), 'issn:0001-0001')
+        self.uf.union(('jcr', 'b'), 'issn:0002-0002')
+        self.uf.union(('scopus', 'c'), 'issn:0002-0002')
+
+        self.uf.union(('scopus', 'd'), 'issn:0003-0003')
+
+
+    def test_transitive_link(self):
+
+        result = self.uf.find(('scielo', 'a')) == self.uf.find(('scopus', 'c'))
+
+        self.assertEqual(True, result)
+
+
+    def test_separate_clusters(self):
+
+        result = self.uf.find(('scielo', 'a')) == self.uf.find(('scopus', 'd'))
+
+        self.assertEqual(False, result)
+
+
+    def test_components(self):
+
+        result = sorted(len(m) for m in self.uf.components().values())
+
+        expected = [2, 5]
+
+        self.assertEqual(expected, result)
+
+
+if __name__ == "__main__":
+    unittest.main()
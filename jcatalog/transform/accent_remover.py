@@ -10,3 +10,13 @@ def accent_remover(text):
     text_norm = u''.join([c for c in norm if not unicodedata.combining(c)])
 
     return text_norm
+
+
+def title_key(text):
+    '''
+    Canonical key of a title (or title_country): without accents, lower
+    case, '&' as 'and' and single spaces.
+    '''
+    text = accent_remover(text).lower().replace('&', ' and ')
+
+    return ' '.join(text.split())
@@ -0,0 +1,108 @@
+# coding: utf-8
+'''
+This script gets the country of the journals of a collection from other
+Data Sets by ISSN.
+
+The map ISSN -> (country, source) of the sources is loaded once, in the
+order of precedence (SciELO, Scopus, Scimago), instead of one query by
+ISSN and source. The journals are read in one pass and the countries
+are sent as unordered bulk writes.
+
+e.g.:
+    backfill(models.Jcr, {'country': {'$exists': False}}, lambda d: [d.get('issn')])
+'''
+import logging
+import datetime
+
+import models
+from bulk_writer import BulkWriter
+from accent_remover import accent_remover, title_key
+
+
+logging.basicConfig(filename='logs/country.info.txt', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# in order of precedence
+SOURCES = [models.Scielo, models.Scopus, models.Scimago]
+
+
+def issn_countries(sources=SOURCES):
+    '''
+    Return {issn: (country, source name)}, the country of an ISSN is the
+    one of the first source and of the first journal with a country.
+    '''
+    result = {}
+
+    for model in sources:
+        for d in model._get_collection().find(
+                {'country': {'$nin': [None, '']}}, {'issn_list': 1, 'country': 1}):
+            for issn in d.get('issn_list') or []:
+                if issn not in result:
+                    result[issn] = (d['country'], model._class_name)
+
+    return result
+
+
+def resolve(countries, issns):
+    '''
+    Return (country, source name) of the first ISSN found, or None.
+    '''
+    for issn in issns:
+        if issn in countries:
+            return countries[issn]
+
+
+def country_data(title, country):
+    data = {'country': country}
+    data['title_country'] = '%s-%s' % (
+        accent_remover(title).lower().replace(' & ', ' and ').replace('&', ' and '),
+        country.lower())
+    data['title_country_key'] = title_key(data['title_country'])
+    # title_country changed: the document is matched again
+    data['updated_at'] = datetime.datetime.now()
+
+    return data
+
+
+def backfill(model, query, issns, countries=None, batch_size=1000):
+    '''
+    Set the country of the journals of the query found in the sources,
+    return the number of journals updated by source, 'without title'
+    (found, but title_country cannot be built) and 'not found'.
+    issns = function of the journal returning its ISSNs, in order
+    '''
+    if countries is None:
+        countries = issn_countries()
+
+    collection = model._get_collection()
+
+    counts = {'without title': 0, 'not found': 0}
+
+    with BulkWriter(collection, batch_size) as writer:
+
+        for doc in collection.find(
+                query, {'issn': 1, 'issn_list': 1, 'title': 1}):
+
+            found = resolve(countries, [i for i in issns(doc) if i])
+
+            if not found:
+                counts['not found'] += 1
+                continue
+
+            if not doc.get('title'):
+                counts['without title'] += 1
+                logger.info(u'%s %s: %s found in %s, without title' % (
+                    model._class_name, doc['_id'], found[0], found[1]))
+                continue
+
+            writer.set(
+                doc['_id'], country_data(doc['title'], found[0]), tag=found[1])
+
+    counts.update(writer.counts)
+
+    msg = u'%s country: %s' % (model._class_name, ', '.join(
+        '%s: %d' % (k, counts[k]) for k in sorted(counts)))
+    logger.info(msg)
+    print(msg)
+
+    return counts
@@ -0,0 +1,166 @@
+# coding: utf-8
+'''
+This script adds the data of a sheet to the journals of a collection.
+
+The journals are found in maps of the collection loaded once (e.g.:
+issn_scielo -> _id), instead of one query by row, and the updates are
+sent as unordered bulk writes. The update of each row is given by a
+function of the row and of the fields of the journal already loaded.
+The added fields are not counted in field_count (completeness.py).
+
+With group=True the updates of the rows of a journal are merged and
+sent once: the values appended by $push/$addToSet are sent together
+with $each, so the arrays are not read and written back by row.
+
+e.g.:
+    enrich(
+        models.Scielo, read_rows(filename, sheet_name='import'),
+        [('issn_scielo', 'issn_scielo')],
+        lambda rec, doc: {'$set': {'docs': dict(rec)}})
+'''
+import logging
+
+from bulk_writer import BulkWriter
+
+
+logging.basicConfig(filename='logs/enrichment.info.txt', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# operators appending to arrays, merged with $each
+APPEND = ('$push', '$addToSet')
+
+
+def key_map(collection, field):
+    '''
+    Return {value: [ids]} of a field of the collection, the values of
+    a list field are all in the map.
+    '''
+    result = {}
+
+    for d in collection.find({field: {'$exists': True}}, {field: 1}):
+        values = d[field] if isinstance(d[field], list) else [d[field]]
+        for v in set(values):
+            result.setdefault(v, []).append(d['_id'])
+
+    return result
+
+
+def merge(into, op):
+    '''
+    Add the MongoDB update op to the update into, the appended values
+    are collected in $each, the other values replace the previous ones.
+    '''
+    for operator, data in op.items():
+        target = into.setdefault(operator, {})
+
+        for field, value in data.items():
+            if operator in APPEND:
+                if isinstance(value, dict) and '$each' in value:
+                    values = value['$each']
+                else:
+                    values = [value]
+                target.setdefault(field, {'$each': []})['$each'].extend(values)
+            else:
+                target[field] = value
+
+    return into
+
+
+def find(maps, rec):
+    '''
+    Return the ids found by the first key finding one journal, or the
+    ids of the first key finding more than one, or [].
+    '''
+    found = []
+
+    for column, ids_by_key in maps:
+        value = column(rec) if callable(column) else rec.get(column)
+        ids = ids_by_key.get(value, [])
+        if len(ids) == 1:
+            return ids
+        if ids and not found:
+            found = ids
+
+    return found
+
+
+def load_fields(collection, ids, fields, batch_size=1000):
+    '''
+    Return {_id: {fields}} of the journals ids.
+    '''
+    ids = list(ids)
+    docs = {}
+
+    for i in range(0, len(ids), batch_size):
+        for d in collection.find(
+                {'_id': {'$in': ids[i:i + batch_size]}}, {f: 1 for f in fields}):
+            docs[d['_id']] = d
+
+    return docs
+
+
+def enrich(model, rows, keys, update, fields=(), group=False, batch_size=1000,
+           name=None):
+    '''
+    Return the number of rows 'matched', 'not found' and 'ambiguous'
+    (more than one journal found by a key and one by none) and the
+    number of 'updated' journals.
+    keys = [(column or function of the row, field of the collection)]
+    tried in order until one journal is found, e.g.:
+        [('issn', 'issn_scielo')]
+    update = function(rec, doc) returning a MongoDB update or None, doc
+    is the dict of fields of the journal and can be changed by update()
+    for the next rows of the same journal
+    fields = fields of the journals loaded for update(), only of the
+    journals found, after reading the rows
+    group = True to send one update by journal after all rows
+    '''
+    collection = model._get_collection()
+
+    maps = [(column, key_map(collection, field)) for column, field in keys]
+
+    counts = {'matched': 0, 'not found': 0, 'ambiguous': 0}
+
+    def matched():
+        for rec in rows:
+            ids = find(maps, rec)
+
+            if len(ids) != 1:
+                counts['ambiguous' if ids else 'not found'] += 1
+                continue
+
+            counts['matched'] += 1
+            yield rec, ids[0]
+
+    pairs = matched()
+
+    docs = {}
+    if fields:
+        pairs = list(pairs)
+        docs = load_fields(collection, set(_id for rec, _id in pairs), fields, batch_size)
+
+    # {_id: update} of the journals when group
+    grouped = {}
+
+    with BulkWriter(collection, batch_size) as writer:
+
+        for rec, _id in pairs:
+
+            op = update(rec, docs.setdefault(_id, {'_id': _id}))
+
+            if op and group:
+                merge(grouped.setdefault(_id, {}), op)
+            elif op:
+                writer.update(_id, op, tag='updated')
+
+        for _id, op in grouped.items():
+            writer.update(_id, op, tag='updated')
+
+    counts['updated'] = writer.counts.get('updated', 0)
+
+    msg = u'%s: %s' % (name or model._class_name, ', '.join(
+        '%s: %d' % (k, counts[k]) for k in sorted(counts)))
+    logger.info(msg)
+    print(msg)
+
+    return counts
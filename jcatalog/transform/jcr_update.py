@@ -5,9 +5,11 @@ country and publisher from other sources and saves in the JCR collection.
 '''
 from accent_remover import *
 import models
+from transform import country_resolver
 
 import logging
-import pyexcel
+import datetime
+from sheet_reader import read_rows
 
 
 logging.basicConfig(
@@ -17,19 +19,15 @@ logger = logging.getLogger(__name__)
 
 
 def thematic_areas():
-    sheet = pyexcel.get_sheet(
-        file_name='data/jcr/jcr_areas/wos_country_publisher_category_2016.xlsx',
-        sheet_name='journals',
-        name_columns_by_row=0)
-
-    jcr_json = sheet.to_records()
+    jcr_json = read_rows(
+        'data/jcr/jcr_areas/wos_country_publisher_category_2016.xlsx',
+        sheet_name='journals')
 
     for j in jcr_json:
         print(j['title'])
 
         query = None
-        lower_title = accent_remover(j['title']).replace(' & ', ' and ').replace('&', ' and ').lower()
-        query = models.Jcr.objects.filter(lower_title__iexact=lower_title)
+        query = models.Jcr.objects.filter(title_key=title_key(j['title']))
 
         if query:
 
@@ -51,6 +49,9 @@ def thematic_areas():
                     data['title_country'] = '%s-%s' % (
                     accent_remover(doc.title).lower().replace(' & ', ' and ').replace('&', ' and '),
                     data['country'].lower())
+                    data['title_country_key'] = title_key(data['title_country'])
+                    # title_country changed: the document is matched again
+                    data['updated_at'] = datetime.datetime.now()
 
                 # Publisher
                 if 'publisher' not in doc:
@@ -63,47 +64,8 @@ def thematic_areas():
 
 
 def country():
-
-    for doc in models.Jcr.objects().batch_size(5):
-
-        if 'country' not in doc:
-            print(doc.issn_list)
-
-            for db in [models.Scielo, models.Scopus, models.Scimago]:
-
-                query = None
-                query = db.objects.filter(issn_list=doc.issn)
-
-                if query:
-
-                    print(db._class_name)
-
-                    data = get_country(query[0])
-
-                    data['title_country'] = '%s-%s' % (
-                        accent_remover(doc.title).lower().replace(' & ', ' and ').replace('&', ' and '),
-                        data['country'].lower())
-
-                    print(data)
-
-                    doc.modify(**data)
-                    doc.save()  # save in dbcol1 collection
-
-                    break
-
-
-def get_country(query):
-
-    data_modify = {}
-
-    if 'country' in query:
-        country = query['country']
-
-        data_modify = {'country': country}
-
-        result = data_modify
-
-    return result
+    country_resolver.backfill(
+        models.Jcr, {'country': {'$exists': False}}, lambda d: [d.get('issn')])
 
 
 def main():
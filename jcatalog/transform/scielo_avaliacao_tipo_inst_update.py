@@ -2,43 +2,27 @@
 '''
 This script reads data from various sources to process and store in MongoDB.
 '''
-import pyexcel
-import json
+from sheet_reader import read_rows
 import models
-
-
-def avaliacao_tipos(filename):
-    sheet = pyexcel.get_sheet(
-        file_name=filename,
-        sheet_name='import',
-        name_columns_by_row=0)
-
-    sheet_json = sheet.to_records()
-
-    for rec in sheet_json:
-
-        query = models.Scielo.objects.filter(issn_scielo=rec['issn_scielo'])
-
-        if len(query) == 1:
-
-            print(rec['issn_scielo'])
-
-            doc = query[0]
-
-            data = {'avaliacao': ''}
-
-            data['avaliacao'] = json.loads(query[0].to_json())['avaliacao']
-
-            data['avaliacao']['tipo_inst'] = rec['tipo_instituicao']
-            data['avaliacao']['tipo_1'] = rec['tipo_1']
-            data['avaliacao']['tipo_2'] = rec['tipo_2']
-            data['avaliacao']['tipo_3'] = rec['tipo_3']
-            data['avaliacao']['tipo_4'] = rec['tipo_4']
-
-            if data:
-                doc.update(**data)
-        else:
-            print("nao encontrado")
+from transform import enrichment
+import manifest
+
+
+def avaliacao_tipos(filename, force=False):
+    return manifest.run_update(
+        models.Scielo, filename,
+        lambda: enrichment.enrich(
+            models.Scielo,
+            read_rows(filename, sheet_name='import'),
+            [('issn_scielo', 'issn_scielo')],
+            lambda rec, doc: {'$set': {
+                'avaliacao.tipo_inst': rec['tipo_instituicao'],
+                'avaliacao.tipo_1': rec['tipo_1'],
+                'avaliacao.tipo_2': rec['tipo_2'],
+                'avaliacao.tipo_3': rec['tipo_3'],
+                'avaliacao.tipo_4': rec['tipo_4']}},
+            name='avaliacao tipo_inst'),
+        force=force)
 
 
 def main():
@@ -2,95 +2,53 @@
 '''
 This script reads data from various sources to process and store in MongoDB.
 '''
-import pyexcel
+from sheet_reader import read_rows
 import logging
-import json
-import models
 
-from transform_date import *
-from accent_remover import *
+import models
+from transform import enrichment
+import manifest
 
 logging.basicConfig(filename='logs/avalicacao.info.txt', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def avaliacao(filename):
-    aval = pyexcel.get_sheet(
-        file_name=filename,
-        sheet_name='import',
-        name_columns_by_row=0)
-
-    aval_json = aval.to_records()
-
-    for rec in aval_json:
-
-        # # remove empty keys
-        # rec = {k: v for k, v in rec.items() if v or v == 0}
-        query = models.Scielo.objects.filter(issn_list=rec['issn_scielo'])
-
-        if len(query) == 1 and 'avaliacao' not in query[0]:
-
-            print(rec['issn_scielo'])
-
-            doc = query[0]
-
-            data = {'avaliacao': ''}
-
-            contatos = []
-            contato = {}
-            for k in [
-                'email_address',
-                'cargo',
-                'first_name',
-                'last_name',
-                'cv_lattes_editor_chefe',
-                'aff_editor_chefe',
-                'orcid_editor_chefe',
-                'email_editor'
-                    ]:
-                if k in rec:
-                    contato[k] = rec[k]
-
-            contatos.append(contato)
-
-            data['avaliacao'] = dict(rec)
-            data['avaliacao']['contatos'] = contatos
-
-            if data:
-                doc.modify(**data)
-                doc.save()
-        else:
-            if len(query) == 1:
-
-                print(rec['issn_scielo'])
-
-                doc = query[0]
-
-                data = {'avaliacao': ''}
-
-                data['avaliacao'] = json.loads(query[0].to_json())['avaliacao']
-
-                contatos_list = []
-                contato = {}
-                for k in [
-                    'email_address',
-                    'cargo',
-                    'first_name',
-                    'last_name',
-                    'cv_lattes_editor_chefe',
-                    'aff_editor_chefe',
-                    'orcid_editor_chefe',
-                    'email_editor'
-                        ]:
-                    if k in rec:
-                        contato[k] = rec[k]
-
-                contatos_list.append(contato)
-
-                data['avaliacao']['contatos'].append(contato)
-
-                if data:
-                    doc.update(**data)
+CONTATO = [
+    'email_address',
+    'cargo',
+    'first_name',
+    'last_name',
+    'cv_lattes_editor_chefe',
+    'aff_editor_chefe',
+    'orcid_editor_chefe',
+    'email_editor']
+
+
+def contato(rec, doc):
+    data = {'$push': {
+        'avaliacao.contatos': {k: rec[k] for k in CONTATO if k in rec}}}
+
+    # first row of the journal: the avaliacao fields of the row
+    if 'avaliacao' not in doc:
+        doc['avaliacao'] = {}
+        data['$set'] = {
+            'avaliacao.' + k: v for k, v in rec.items() if k}
+
+    return data
+
+
+def avaliacao(filename, force=False):
+    return manifest.run_update(
+        models.Scielo, filename,
+        lambda: enrichment.enrich(
+            models.Scielo,
+            read_rows(filename, sheet_name='import'),
+            [('issn_scielo', 'issn_list')],
+            contato,
+            fields=['avaliacao.contatos'],
+            group=True,
+            name=filename),
+        force=force)
 
 
 def main():
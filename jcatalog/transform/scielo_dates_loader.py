@@ -2,10 +2,12 @@
 '''
 This script reads data from various sources to process and store in MongoDB.
 '''
-import pyexcel
+from sheet_reader import read_rows
 import logging
 import models
+import staging
 import datetime
+from transform_date import Issn
 
 
 logging.basicConfig(filename='logs/scielodatesnfo.txt', level=logging.INFO)
@@ -13,10 +15,6 @@ logger = logging.getLogger(__name__)
 
 
 def scielodates():
-    scielo_sheet = pyexcel.get_sheet(
-        file_name='data/scielo/documents_dates_network.csv',
-        name_columns_by_row=0)
-
     # Key correction
     cols = [
         'extraction_date',
@@ -69,13 +67,22 @@ def scielodates():
         'document_updated_in_scielo_at_month',
         'document_updated_in_scielo_at_day']
 
-    for i, k in enumerate(cols):
-        scielo_sheet.colnames[i] = k
+    scielo_json = read_rows(
+        'data/scielo/documents_dates_network.csv', columns=cols)
+
+    # the live collection is replaced only when the load is complete
+    stage = staging.collection(models.Scielodates)
+    count = staging.insert(models.Scielodates, stage, records(scielo_json))
+    staging.swap(models.Scielodates, stage, count)
 
-    scielo_json = scielo_sheet.to_records()
+    num_posts = models.Scielodates.objects().count()
+    msg = u'Registred %d posts in SciELO Dates collection' % num_posts
+    logger.info(msg)
+    print(msg)
 
-    models.Scielodates.drop_collection()
 
+def records(scielo_json):
+    # rows of the sheet as Scielodates documents, read while inserting
     for register in scielo_json:
         rec = dict(register)
         for key, value in rec.items():
@@ -85,7 +92,7 @@ def scielodates():
         # convert issn int type to str type
         if type(rec['issns']) != str:
             rec['issns'] = Issn().issn_hifen(rec['issns'])
-            msg = u'issn converted: %s - %s' % (rec['issns'], rec['title'])
+            msg = u'issn converted: %s - %s' % (rec['issns'], rec.get('title_at_scielo'))
             logger.info(msg)
 
         # convert in list
@@ -100,13 +107,7 @@ def scielodates():
         # remove empty keys
         rec = {k: v for k, v in rec.items() if v or v == 0}
 
-        mdata = models.Scielodates(**rec)
-        mdata.save()
-
-    num_posts = models.Scielodates.objects().count()
-    msg = u'Registred %d posts in SciELO Dates collection' % num_posts
-    logger.info(msg)
-    print(msg)
+        yield rec
 
 
 def main():
@@ -2,41 +2,28 @@
 '''
 This script reads data from various sources to process and store in MongoDB.
 '''
-import pyexcel
+from sheet_reader import read_rows
 import logging
 
 import models
-from transform_date import *
-from accent_remover import *
+from transform import enrichment
+import manifest
 
 logging.basicConfig(filename='logs/docs.info.txt', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 # Add Access count for journals
-def docs(filename):
-    access = pyexcel.get_sheet(
-        file_name=filename,
-        sheet_name='import',
-        name_columns_by_row=0)
-
-    access_json = access.to_records()
-
-    for rec in access_json:
-        # # remove empty keys
-        # rec = {k: v for k, v in rec.items() if v or v == 0}
-        print(rec['issn_scielo'])
-        query = models.Scielo.objects.filter(issn_scielo=rec['issn_scielo'])
-
-        if len(query) == 1:
-            doc = query[0]
-            print(query[0]['issn_scielo'])
-            data = {'docs': {}}
-            data['docs'] = dict(rec)
-
-            if data:
-                doc.modify(**data)
-                doc.save()
+def docs(filename, force=False):
+    return manifest.run_update(
+        models.Scielo, filename,
+        lambda: enrichment.enrich(
+            models.Scielo,
+            read_rows(filename, sheet_name='import'),
+            [('issn_scielo', 'issn_scielo')],
+            lambda rec, doc: {'$set': {'docs': dict(rec)}},
+            name='docs'),
+        force=force)
 
 
 def main():
@@ -2,43 +2,35 @@
 '''
 This script reads data from various sources to process and store in MongoDB.
 '''
-import pyexcel
+from sheet_reader import read_rows
 import logging
 
-from accent_remover import *
+from accent_remover import accent_remover, title_key
 import models
+from transform import enrichment
+import manifest
 
 
 logging.basicConfig(filename='logs/esci.info.txt', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def esci(filename):
-    sheet = pyexcel.get_sheet(
-        file_name=filename,
-        sheet_name='import',
-        name_columns_by_row=0)
+def title_country_key(rec):
+    title_country = '%s-%s' % (accent_remover(rec['title']).lower().replace(' & ', ' and ').replace('&', ' and '), 'brazil')
+    return title_key(title_country)
 
-    sheet_json = sheet.to_records()
 
-    for rec in sheet_json:
-        print(rec['issn'])
-
-        data = None
-        query = models.Scielo.objects.filter(issn_scielo=rec['issn'])
-
-        if len(query) == 1:
-            data = {'esci': 1}
-        else:
-            title_country = '%s-%s' % (accent_remover(rec['title']).lower().replace(' & ', ' and ').replace('&', ' and '), 'brazil')
-
-            query = models.Scielo.objects.filter(title_country=title_country)
-            if len(query) == 1:
-                print(title_country)
-                data = {'esci': 1}
-
-        if data:
-            query[0].modify(**data)
+def esci(filename, force=False):
+    # by ISSN, or by title and country
+    return manifest.run_update(
+        models.Scielo, filename,
+        lambda: enrichment.enrich(
+            models.Scielo,
+            read_rows(filename, sheet_name='import'),
+            [('issn', 'issn_scielo'), (title_country_key, 'title_country_key')],
+            lambda rec, doc: {'$set': {'esci': 1}},
+            name='esci'),
+        force=force)
 
 
 def main():
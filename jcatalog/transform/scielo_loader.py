@@ -2,7 +2,7 @@
 '''
 This script reads data from various sources to process and store in MongoDB.
 '''
-import pyexcel
+from sheet_reader import read_rows
 import logging
 import json
 import requests
@@ -10,6 +10,10 @@ import requests
 import keycorrection
 from transform import collections_scielo
 import models
+from completeness import field_count
+import bloom
+import staging
+import manifest
 from transform_date import *
 from accent_remover import *
 from articlemeta.client import ThriftClient
@@ -17,19 +21,22 @@ from articlemeta.client import ThriftClient
 logging.basicConfig(filename='logs/procstore.info.txt', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SCIELO_FILE = 'data/scielo/journals.csv'
+DOAJ_FILE = 'data/doaj/controle_DOAJ.xlsx'
+SUBMISSIONS_FILE = 'data/submiss/sistemas_submissao_scielo_brasil.xlsx'
 
-def scieloproc():
-    scielo_sheet = pyexcel.get_sheet(
-        file_name='data/scielo/journals.csv',
-        name_columns_by_row=0)
 
-    # Key correction
-    for i, k in enumerate(keycorrection.scielo_columns_names):
-        scielo_sheet.colnames[i] = k
+def scieloproc(force=False):
+    return manifest.run_load(
+        models.Scielo, lambda: scielo_journals(SCIELO_FILE), [SCIELO_FILE], force=force)
 
-    scielo_json = scielo_sheet.to_records()
 
-    models.Scielo.drop_collection()
+def scielo_journals(file_name):
+    scielo_json = read_rows(
+        file_name,
+        columns=keycorrection.scielo_columns_names)
+
+    docs = []
 
     for rec in scielo_json:
 
@@ -45,6 +52,10 @@ def scieloproc():
                 accent_remover(rec['title']).lower().replace(' & ', ' and ').replace('&', ' and '),
                 rec['country'].lower())
 
+            rec['title_country_key'] = title_key(rec['title_country'])
+
+        rec['title_key'] = title_key(rec['title'])
+
         # convert issn int type to str type
         if type(rec['issns']) != str:
             rec['issns'] = Issn().issn_hifen(rec['issns'])
@@ -71,14 +82,24 @@ def scieloproc():
         rec = {k: v for k, v in rec.items() if v or v == 0}
 
         if rec['collection'] not in ['sss', 'rve', 'psi', 'rvt']:
-            mdata = models.Scielo(**rec)
-            mdata.save()
+            rec['field_count'] = field_count(rec)
+
+            docs.append(rec)
+
+    stage = staging.collection(models.Scielo)
+    count = staging.insert(
+        models.Scielo, stage, docs, key=staging.field_key(['issn_list']))
+    staging.swap(models.Scielo, stage, count)
 
     num_posts = models.Scielo.objects().count()
     msg = u'Registred %d posts in SciELO collection' % num_posts
     logger.info(msg)
     print(msg)
 
+    bloom.build(models.Scielo)
+
+    return num_posts
+
 
 def scieloapi():
 
@@ -111,18 +132,17 @@ def scieloapi():
                     doc.save()
 
 
-def doajproc():
-    doaj_sheet = pyexcel.get_sheet(
-        file_name='data/doaj/controle_DOAJ.xlsx',
-        name_columns_by_row=0)
+def doajproc(force=False):
+    return manifest.run_load(
+        models.Doaj, lambda: doaj_journals(DOAJ_FILE), [DOAJ_FILE], force=force)
 
-    # Key correction
-    for i, k in enumerate(keycorrection.doaj_columns_names):
-        doaj_sheet.colnames[i] = k
 
-    doaj_json = doaj_sheet.to_records()
+def doaj_journals(file_name):
+    doaj_json = read_rows(
+        file_name,
+        columns=keycorrection.doaj_columns_names)
 
-    models.Doaj.drop_collection()
+    docs = []
 
     for rec in doaj_json:
 
@@ -132,28 +152,36 @@ def doajproc():
         # remove empty keys
         rec = {k: v for k, v in rec.items() if v or v == 0}
 
-        mdata = models.Doaj(**rec)
-        mdata.save()
+        docs.append(rec)
+
+    stage = staging.collection(models.Doaj)
+    count = staging.insert(
+        models.Doaj, stage, docs, key=staging.field_key(['issn_list']))
+    staging.swap(models.Doaj, stage, count)
 
     num_posts = models.Doaj.objects().count()
     msg = u'Registred %d posts in DOAJ collection' % num_posts
     logger.info(msg)
     print(msg)
 
+    bloom.build(models.Doaj)
+
+    return num_posts
+
 
 # Add OJS and ScholarOne
-def submissions():
-    submiss_sheet = pyexcel.get_sheet(
-        file_name='data/submiss/sistemas_submissao_scielo_brasil.xlsx',
-        name_columns_by_row=0)
+def submissions(force=False):
+    return manifest.run_load(
+        models.Submissions, lambda: submissions_journals(SUBMISSIONS_FILE),
+        [SUBMISSIONS_FILE], force=force)
 
-    # Key correction
-    for i, k in enumerate(keycorrection.submission_scielo_brasil_columns_names):
-        submiss_sheet.colnames[i] = k
 
-    submiss_json = submiss_sheet.to_records()
+def submissions_journals(file_name):
+    submiss_json = read_rows(
+        file_name,
+        columns=keycorrection.submission_scielo_brasil_columns_names)
 
-    models.Submissions.drop_collection()
+    docs = []
 
     for rec in submiss_json:
 
@@ -163,14 +191,20 @@ def submissions():
         # remove empty keys
         rec = {k: v for k, v in rec.items() if v or v == 0}
 
-        mdata = models.Submissions(**rec)
-        mdata.save()
+        docs.append(rec)
+
+    stage = staging.collection(models.Submissions)
+    staging.swap(models.Submissions, stage, staging.insert(models.Submissions, stage, docs))
 
     num_posts = models.Submissions.objects().count()
     msg = u'Registred %d posts in Submissions collection' % num_posts
     logger.info(msg)
     print(msg)
 
+    bloom.build(models.Submissions)
+
+    return num_posts
+
 
 # Crossref
 def crossref():
@@ -3,52 +3,44 @@
 This script reads data from various sources to process and store in MongoDB.
 '''
 import os
-import pyexcel
+from sheet_reader import read_rows
 import logging
-import json
 
 import models
-from transform_date import *
-from accent_remover import *
+from transform import enrichment
+import manifest
 
 logging.basicConfig(filename='logs/aff.info.txt', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-# Add manuscripts for journals
-def manus(filename):
-    sheet = pyexcel.get_sheet(
-        file_name=filename,
-        sheet_name='import',
-        name_columns_by_row=0)
-
-    sheet_json = sheet.to_records()
+def manuscripts(rec, doc):
+    if 'manuscritos' not in doc:
+        doc['manuscritos'] = dict(rec)
+        return {'$set': {'manuscritos': dict(rec)}}
 
-    for rec in sheet_json:
-        print(rec['issn_scielo'])
+    # keys not in manuscritos yet
+    data = {
+        'manuscritos.' + k: v for k, v in rec.items() if k not in doc['manuscritos']}
+    for k, v in rec.items():
+        doc['manuscritos'].setdefault(k, v)
 
-        query = models.Scielo.objects.filter(issn_scielo=rec['issn_scielo'])
+    if data:
+        return {'$set': data}
 
-        if len(query) == 1 and 'manuscritos' not in query[0]:
 
-            doc = query[0]
-            print(query[0]['issn_scielo'])
-            data = {'manuscritos': {}}
-            data['manuscritos'] = dict(rec)
-
-            if data:
-                doc.modify(**data)
-                # doc.save()
-        else:
-            if len(query) == 1:
-                doc = query[0]
-                data = {'manuscritos': ''}
-                data['manuscritos'] = json.loads(query[0].to_json())['manuscritos']
-                for k, v in rec.items():
-                    if k not in data['manuscritos']:
-                        data['manuscritos'][k] = rec[k]
-            if data:
-                doc.update(**data)
+# Add manuscripts for journals
+def manus(filename, force=False):
+    return manifest.run_update(
+        models.Scielo, filename,
+        lambda: enrichment.enrich(
+            models.Scielo,
+            read_rows(filename, sheet_name='import'),
+            [('issn_scielo', 'issn_scielo')],
+            manuscripts,
+            fields=['manuscritos'],
+            name=filename),
+        force=force)
 
 
 def main():
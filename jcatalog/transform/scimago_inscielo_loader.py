@@ -5,11 +5,13 @@ This script reads data from Scimago xlsx files to process and laod in MongoDB.
 import os
 import sys
 import models
-import pyexcel
+from sheet_reader import read_rows
 import keycorrection
 import logging
 from accent_remover import *
 import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 PROJECT_PATH = os.path.abspath(os.path.dirname(''))
 sys.path.append(PROJECT_PATH)
@@ -18,57 +20,72 @@ logging.basicConfig(filename='logs/scimago_loader.info.txt', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def scimago_loader():
-    filelist = [f for f in os.listdir('data/scimago/xlsx/inscielo') if '.xlsx' in f]
-    filelist.sort()
+def parse_file(f):
+    '''
+    Read one file, return the issn_list of each row. Run in the process
+    pool.
+    '''
+    issn_lists = []
+
+    for rec in read_rows(
+            'data/scimago/xlsx/inscielo/' + f,
+            columns=keycorrection.scimago_columns_names):
 
-    for f in filelist:
+        issns = rec['issn'].replace('ISSN ', '').replace(' ', '').split(',')
+        issn_lists.append([i[0:4] + '-' + i[4:8] for i in issns])
 
-        year = f[-16:-12]
-        region = f[8:-15]
+    return f, issn_lists
 
-        print('ini: ' + str(datetime.datetime.now()))
-        print('%s %s %s' % (year, region, f))
 
-        scimago_sheet = pyexcel.get_sheet(
-            file_name='data/scimago/xlsx/inscielo/' + f,
-            name_columns_by_row=0)
+def scimago_loader(workers=None):
+    '''
+    The files are parsed in a process pool, the journals are found in an
+    ISSN index of the Scimago collection and updated in one bulk write.
+    workers = number of processes, default: number of CPUs
+    '''
+    filelist = [f for f in os.listdir('data/scimago/xlsx/inscielo') if '.xlsx' in f]
+    filelist.sort()
+
+    print('ini: ' + str(datetime.datetime.now()))
 
-        # Key correction
-        for i, k in enumerate(keycorrection.scimago_columns_names):
-            scimago_sheet.colnames[i] = k
+    # issn -> ids of Scimago
+    by_issn = {}
+    for d in models.Scimago._get_collection().find({}, {'issn_list': 1}):
+        for issn in set(d.get('issn_list') or []):
+            by_issn.setdefault(issn, []).append(d['_id'])
 
-        scimago_json = scimago_sheet.to_records()
+    inscielo = set()
 
-        for rec in scimago_json:
+    ctx = multiprocessing.get_context('spawn')
 
-            issns = rec['issn'].replace('ISSN ', '').replace(' ', '').split(',')
-            rec['issn_list'] = [i[0:4] + '-' + i[4:8] for i in issns]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
 
-            # check if exist in DB - update inSciELO
-            flag = 0
+        for f, issn_lists in executor.map(parse_file, filelist):
 
-            for issn in rec['issn_list']:
+            for issn_list in issn_lists:
 
-                query = models.Scimago.objects.filter(issn_list=issn)
+                # check if exist in DB - update inSciELO
+                for issn in issn_list:
 
-                if len(query) == 1 and flag == 0:
+                    if len(by_issn.get(issn, [])) == 1:
+                        inscielo.add(by_issn[issn][0])
+                        break
 
-                    data = {}
-                    data['inscielo'] = 1
+            msg = '%s: %d rows' % (f, len(issn_lists))
+            logger.info(msg)
 
-                    query[0].modify(**data)
-                    query[0].save()
+            print(msg)
 
-                    flag = 1
-                    break
+    if inscielo:
+        models.Scimago._get_collection().update_many(
+            {'_id': {'$in': list(inscielo)}}, {'$set': {'inscielo': 1}})
 
-        msg = issn
-        logger.info(msg)
+    msg = u'%d journals in SciELO in Scimago collection' % len(inscielo)
+    logger.info(msg)
 
-        print(msg)
+    print(msg)
 
-        print('fim:' + str(datetime.datetime.now()) + '\n')
+    print('fim:' + str(datetime.datetime.now()) + '\n')
 
 
 def main():
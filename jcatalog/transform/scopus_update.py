@@ -4,10 +4,12 @@ This script reads data from Scopus CiteScore
 to process and update Scopus collections in MongoDB.
 '''
 import logging
-import pyexcel
+from sheet_reader import read_sheets
 
 import models
 import keycorrection
+import manifest
+from bulk_writer import BulkWriter
 from accent_remover import *
 
 
@@ -15,46 +17,76 @@ logging.basicConfig(filename='logs/scopus_update.txt', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def scopuscs(filename, year):
-    scopus_sheet = pyexcel.get_sheet(
-        file_name=filename,
-        sheet_name=year + ' All',
-        name_columns_by_row=0)
+def scopuscs(filename, years, force=False):
+    '''
+    Add the CiteScore, SJR and SNIP of the years to the Scopus journals,
+    unless the file, the years and the last load of Scopus did not change
+    (manifest.py). Return the number of updated journals.
+    '''
+    return manifest.run_update(
+        models.Scopus, filename, lambda: citescore(filename, years),
+        deps={'years': years}, force=force)
 
-    print(str(year))
 
-    # Key correction
-    for i, k in enumerate(keycorrection.scopuscitscore_columns_names):
-        scopus_sheet.colnames[i] = k
+def citescore(filename, years):
+    '''
+    The workbook is opened once for the sheets '<year> All' and the
+    journals are found in a sourcerecord_id map of the collection.
+    '''
+    col = models.Scopus._get_collection()
 
-    scopus_sheet.column.format('print_issn', str)
-    scopus_sheet.column.format('eissn', str)
-    scopus_json = scopus_sheet.to_records()
+    # sourcerecord_id -> ids of Scopus
+    ids = {}
+    for d in col.find({'sourcerecord_id': {'$exists': True}}, {'sourcerecord_id': 1}):
+        ids.setdefault(d['sourcerecord_id'], []).append(d['_id'])
 
-    for rec in scopus_json:
-        print(str(year)+'_'+str(rec['scopus_sourceid']))
+    # _id -> {year: {citescore, sjr, snip}}
+    updates = {}
 
-        # remove empty keys
-        rec = {k: v for k, v in rec.items() if v or v == 0}
+    sheets = read_sheets(
+        filename,
+        [year + ' All' for year in years],
+        columns=keycorrection.scopuscitscore_columns_names,
+        types={'print_issn': str, 'eissn': str},
+        cache=True)
 
-        query = models.Scopus.objects.filter(
-            sourcerecord_id=rec['scopus_sourceid'])
+    for year, (sheet_name, scopus_json) in zip(years, sheets):
 
-        if len(query) == 1:
+        found = 0
 
-            data = {}
+        for rec in scopus_json:
 
-            for k in ['citescore', 'sjr', 'snip']:
+            # remove empty keys
+            rec = {k: v for k, v in rec.items() if v or v == 0}
 
-                if year not in data and k in rec:
-                    data = {year: {}}
+            query = ids.get(rec.get('scopus_sourceid'), [])
 
-                if k in rec and rec[k] != '':
-                    data[year].update({k: float(rec[k])})
+            if len(query) == 1:
 
-            if len(data) > 0:
-                query[0].modify(**data)
-                query[0].save()
+                data = {}
+
+                for k in ['citescore', 'sjr', 'snip']:
+
+                    if k in rec and rec[k] != '':
+                        data[k] = float(rec[k])
+
+                if data:
+                    updates.setdefault(query[0], {})[year] = data
+                    found += 1
+
+        msg = u'%s: %d journals' % (sheet_name, found)
+        logger.info(msg)
+        print(msg)
+
+    with BulkWriter(col) as writer:
+        for _id, data in updates.items():
+            writer.set(_id, data)
+
+    msg = u'Updated %d Scopus journals' % len(updates)
+    logger.info(msg)
+    print(msg)
+
+    return len(updates)
 
 
 def main():
@@ -62,8 +94,7 @@ def main():
     filename = 'data/scopus/CiteScore_Metrics_2011-2016_Download_06Feb2018.xlsx'
 
     # Updates from year 2011 to 2013
-    for year in range(2011, 2014):
-        scopuscs(filename, str(year))
+    scopuscs(filename, [str(year) for year in range(2011, 2014)])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,527 @@
+# coding: utf-8
+'''
+This script loads the journals Data Sets of the sources described by a
+spec: the sheets to read, their columns, the ISSN fields, the yearly
+indicators and the key of the documents merged across rows and files.
+
+Every source runs the same steps: read the rows (sheet_reader), build
+issn_list, title_key and title_country, remove the empty keys, move the
+indicators of the year into a year subdocument, merge the rows of the
+same journal in memory and write the documents in batches of
+insert_many. Sources without merge keys are written while reading. The
+documents are written in a staging collection that replaces the live
+one at the end (staging.py).
+
+A spec is a dict:
+    model = name of the models class, e.g.: 'Scopus'
+    file_name = sheet of the source, or
+    files = function returning [(file_name, year, {fields of the rows})]
+    columns = keycorrection names of the columns
+    types = {column: function} applied while reading
+    sheet_name = sheet of the xlsx files, default: the first one
+    (the parsed sheets are cached, see sheet_cache.py)
+    dedup = True to remove repeated rows of each file
+    prepare = function(rec) -> rec, specific to the source
+    title = column copied to title
+    issn = columns with ISSNs, a cell may have more than one
+    require_issn = True to skip the rows without ISSN
+    country = column of the country of title_country
+    title_country = function(title) -> title part of title_country,
+    default: accent_remover(title).lower()
+    year_column = column of the year, kept by the next rows when empty
+    indicators = [(function, key)] moved to rec[year]
+    indicator_years = years of the <key>_<year> indicator columns
+    convert = function(function, value) of the indicators
+    keys = fields of a journal found in other rows, e.g.: ['issn_list']
+    first_year = True to keep the year subdocument of the first row of a
+    journal, default: the one of the last row
+    list_fields = list fields added to the merged journal
+    journals = False when it is not a journals Data Set: no field_count
+    and no bloom filter
+'''
+import os
+import copy
+import json
+import inspect
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import models
+import bloom
+import staging
+import manifest
+import keycorrection
+from completeness import field_count
+from dedup import dedup
+from sheet_reader import read_rows
+from accent_remover import *
+
+
+logging.basicConfig(filename='logs/source_loader.info.txt', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# version of the steps shared by the sources (parse_rows, pivot,
+# consolidate), a new version loads every source again
+VERSION = '1'
+
+
+def issn_values(value):
+    '''
+    ISSNs of a cell, e.g.: 'ISSN 00344567, 1234567X' or 12345678
+    '''
+    issns = []
+
+    for v in str(value).replace('ISSN ', '').split(','):
+        v = v.strip()
+
+        if v.isdigit() and len(v) < 8:
+            # a numeric ISSN read as a number
+            v = v.zfill(8)
+
+        if len(v) == 8 and '-' not in v:
+            v = v[0:4] + '-' + v[4:8]
+
+        if len(v) == 9:
+            issns.append(v)
+
+    return issns
+
+
+def lower_title(title):
+    return accent_remover(title).lower()
+
+
+def and_title(title):
+    # '&' as 'and'
+    return lower_title(title).replace(' & ', ' and ').replace('&', ' and ')
+
+
+def pivot(rec, spec, year):
+    '''
+    Move the indicators to rec[year], return the years.
+    '''
+    convert = spec.get('convert') or (lambda t, v: t(v) if t else v)
+
+    years = spec.get('indicator_years') or ([str(year)] if year else [])
+
+    for y in years:
+        for t, k in spec.get('indicators', []):
+
+            column = k + '_' + y if spec.get('indicator_years') else k
+
+            if column in rec:
+                rec.setdefault(y, {})[k] = convert(t, rec[column])
+                del rec[column]
+
+    return [y for y in years if y in rec]
+
+
+def parse_rows(spec, file_name, year, fields):
+    '''
+    Yield (rec, years) of the rows of one file.
+    '''
+    rows = read_rows(
+        file_name,
+        columns=spec.get('columns'),
+        types=spec.get('types'),
+        sheet_name=spec.get('sheet_name'),
+        cache=True)
+
+    if spec.get('dedup'):
+        rows = dedup(rows)
+
+    for rec in rows:
+
+        rec.update(copy.deepcopy(fields))
+
+        if spec.get('prepare'):
+            rec = spec['prepare'](rec)
+
+        if spec.get('year_column'):
+            year = rec.get(spec['year_column']) or year
+
+        if spec.get('title'):
+            rec['title'] = rec[spec['title']]
+
+        if spec.get('issn'):
+            rec['issn_list'] = []
+            for column in spec['issn']:
+                for issn in issn_values(rec.get(column) or ''):
+                    if issn not in rec['issn_list']:
+                        rec['issn_list'].append(issn)
+
+            if spec.get('require_issn') and not rec['issn_list']:
+                continue
+
+        if spec.get('country'):
+            rec['country'] = rec.get(spec['country'])
+
+        if rec.get('title'):
+            rec['title_key'] = title_key(rec['title'])
+
+            if rec.get('country'):
+                rec['title_country'] = '%s-%s' % (
+                    (spec.get('title_country') or lower_title)(rec['title']),
+                    rec['country'].lower())
+                rec['title_country_key'] = title_key(rec['title_country'])
+
+        # remove empty keys
+        rec = {k: v for k, v in rec.items() if v or v == 0}
+
+        yield rec, pivot(rec, spec, year)
+
+
+def parse_file(spec, file_name, year, fields):
+    # run in the process pool
+    return file_name, list(parse_rows(spec, file_name, year, fields))
+
+
+def source_files(spec):
+    if spec.get('files'):
+        return spec['files']()
+    return [(spec['file_name'], None, {})]
+
+
+def parsed_files(spec, files, workers):
+    '''
+    Yield (file_name, rows) in the order of files, the files are parsed
+    in a process pool when workers != 1.
+    '''
+    if workers == 1:
+        for file_name, year, fields in files:
+            yield file_name, parse_rows(spec, file_name, year, fields)
+        return
+
+    ctx = multiprocessing.get_context('spawn')
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+        for result in executor.map(
+                parse_file,
+                *zip(*[(spec, f, y, d) for f, y, d in files])):
+            yield result
+
+
+def consolidate(spec, parsed):
+    '''
+    Merge the rows of the same journal, in order of the files: a row
+    found by one of the keys adds its list fields and its years to the
+    journal. Return the journals in order of creation.
+    '''
+    journals = []
+    # (key, value) -> journal
+    index = {}
+
+    list_fields = ['issn_list'] + spec.get('list_fields', [])
+
+    for file_name, rows in parsed:
+
+        for rec, years in rows:
+
+            values = []
+            for key in spec['keys']:
+                v = rec.get(key)
+                values.extend((key, i) for i in (v if isinstance(v, list) else [v]) if i)
+
+            journal = next((index[kv] for kv in values if kv in index), None)
+
+            if journal is None:
+                journal = rec
+                journals.append(journal)
+
+            else:
+                for f in list_fields:
+                    for v in rec.get(f, []):
+                        if v not in journal.setdefault(f, []):
+                            journal[f].append(v)
+
+                for y in years:
+                    if spec.get('first_year'):
+                        journal.setdefault(y, rec[y])
+                    else:
+                        journal[y] = rec[y]
+
+                values = [
+                    (key, i) for key in spec['keys']
+                    for i in (journal[key] if isinstance(journal.get(key), list)
+                              else [journal.get(key)]) if i]
+
+            for kv in values:
+                index.setdefault(kv, journal)
+
+        msg = u'%s: %d journals' % (file_name, len(journals))
+        logger.info(msg)
+        print(msg)
+
+    return journals
+
+
+def field_counts(docs):
+    for rec in docs:
+        rec['field_count'] = field_count(rec)
+        yield rec
+
+
+def spec_digest(spec):
+    '''
+    Digest of the spec: its columns, mapping and options, the source of
+    its functions and the VERSION of the loader, so a change of the spec
+    or of a prepare function loads the source again.
+    '''
+    def value(v):
+        if callable(v):
+            try:
+                return inspect.getsource(v)
+            except (OSError, TypeError):
+                return getattr(v, '__name__', repr(v))
+        if isinstance(v, dict):
+            return {str(k): value(i) for k, i in v.items()}
+        if isinstance(v, (list, tuple)):
+            return [value(i) for i in v]
+        return v
+
+    text = json.dumps(
+        {'spec': value(spec), 'version': VERSION}, sort_keys=True, default=str)
+
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def load(spec, files=None, workers=1, batch_size=1000, force=False,
+         min_ratio=staging.MIN_RATIO):
+    '''
+    Load the collection of the source through a staging collection,
+    unless its files and its spec did not change since the last load
+    and the collection is still the one it left (manifest.py).
+    files = [(file_name, year, {fields})], default: the files of the spec
+    workers = number of processes parsing the files, None: number of CPUs
+    force = True to load even when the files did not change
+    min_ratio = see staging.swap(), None when the source really shrank
+    Return the number of documents.
+    '''
+    files = files or source_files(spec)
+
+    return manifest.run_load(
+        getattr(models, spec['model']),
+        lambda: load_files(spec, files, workers, batch_size, min_ratio),
+        files=[f for f, year, fields in files],
+        deps={'spec': spec_digest(spec)},
+        force=force)
+
+
+def load_files(spec, files, workers=1, batch_size=1000, min_ratio=staging.MIN_RATIO):
+    model = getattr(models, spec['model'])
+    journals = spec.get('journals', True)
+
+    parsed = parsed_files(spec, files, workers)
+
+    if spec.get('keys'):
+        docs = consolidate(spec, parsed)
+    else:
+        # nothing to merge: written while reading
+        docs = (rec for file_name, rows in parsed for rec, years in rows)
+
+    if journals:
+        docs = field_counts(docs)
+
+    # the live collection is replaced only when the load is complete,
+    # the journals found again by their keys keep their identity
+    stage = staging.collection(model)
+    count = staging.insert(
+        model, stage, docs, batch_size,
+        key=staging.field_key(spec['keys']) if spec.get('keys') else None)
+    staging.swap(model, stage, count, min_ratio)
+
+    num_posts = model.objects().count()
+    msg = u'Registred %d posts in %s collection' % (num_posts, spec['model'])
+    logger.info(msg)
+    print(msg)
+
+    if journals:
+        bloom.build(model)
+
+    return num_posts
+
+
+# Sources
+
+def scopus_prepare(rec):
+    if type(rec.get('sourcerecord_id')) == str:
+        rec['sourcerecord_id'] = int(rec['sourcerecord_id'])
+
+    # Codes ASJC
+    codes = str(rec.get('all_science_classification_codes_asjc', ''))
+    rec['asjc_code_list'] = [c for c in codes.replace(' ', '').split(';') if c]
+
+    return rec
+
+
+SCOPUS = {
+    'model': 'Scopus',
+    'file_name': 'data/scopus/ext_list_October_2017.xlsx',
+    'columns': keycorrection.scopus_columns_names,
+    'types': {'print_issn': str, 'e_issn': str},
+    'prepare': scopus_prepare,
+    'issn': ['print_issn', 'e_issn'],
+    'country': 'publishers_country',
+    'title_country': and_title,
+    'indicators': [(float, 'citescore'), (float, 'sjr'), (float, 'snip')],
+    'indicator_years': ['2014', '2015', '2016']}
+
+
+def scimago_files():
+    filelist = [f for f in os.listdir('data/scimago/xlsx') if '.xlsx' in f]
+    filelist.sort()
+
+    return [
+        ('data/scimago/xlsx/' + f, f[-9:-5], {'region': f[8:-10].replace('_', ' ')})
+        for f in filelist]
+
+
+def scimago_prepare(rec):
+    # categories
+    if rec.get('categories'):
+        rec['categories_list'] = rec['categories'].split(';')
+    rec.pop('categories', None)
+
+    return rec
+
+
+SCIMAGO = {
+    'model': 'Scimago',
+    'files': scimago_files,
+    'columns': keycorrection.scimago_columns_names,
+    'prepare': scimago_prepare,
+    'issn': ['issn'],
+    # rows without ISSN were all merged in one journal with issn_list ['-']
+    'require_issn': True,
+    'country': 'country',
+    'indicators': [(None, k) for k in [
+        'rank',
+        'sjr',
+        'sjr_best_quartile',
+        'h_index',
+        'total_docs',
+        'total_docs_3years',
+        'total_refs',
+        'total_cites_3years',
+        'citable_docs_3years',
+        'cites_by_doc_2years',
+        'ref_by_doc',
+        'categories_list']],
+    'keys': ['issn_list']}
+
+
+def cwts_prepare(rec):
+    # '-' is an empty ISSN
+    for k in ['print_issn', 'electronic_issn']:
+        if rec.get(k) == '-':
+            del rec[k]
+
+    return rec
+
+
+CWTS = {
+    'model': 'Cwts',
+    'file_name': 'data/cwts/CWTS Journal Indicators June 2017.xlsx',
+    'columns': keycorrection.cwts_columns_names,
+    'prepare': cwts_prepare,
+    'issn': ['print_issn', 'electronic_issn'],
+    'require_issn': True,
+    'year_column': 'year',
+    'indicators': [(None, k) for k in [
+        'asjc_field_ids',
+        'citing_source',
+        'p',
+        'ipp',
+        'ipp_lower_bound',
+        'ipp_upper_bound',
+        'snip',
+        'snip_lower_bound',
+        'snip_upper_bound',
+        'percentage_self_cit']],
+    'keys': ['issn_list']}
+
+
+def jcr_files():
+    filelist = [f for f in os.listdir('data/jcr/jcr_all/')]
+    filelist.sort()
+
+    # f[4:8] = edition
+    return [
+        ('data/jcr/jcr_all/' + f, f[9:13], {'citation_database': [f[4:8]]})
+        for f in filelist]
+
+
+def jcr_prepare(rec):
+    rec['lower_title'] = accent_remover(
+        str(rec.get('title', ''))).replace(' & ', ' and ').replace('&', ' and ').lower()
+
+    return rec
+
+
+def jcr_convert(t, value):
+    if type(value) == str and ',' in value:
+        return int(value.replace(',', ''))
+    elif type(value) == str and 'Not Available' in value:
+        return str(value)
+    return t(value)
+
+
+JCR = {
+    'model': 'Jcr',
+    'files': jcr_files,
+    'columns': keycorrection.jcr_columns_names,
+    'dedup': True,
+    'prepare': jcr_prepare,
+    'issn': ['issn'],
+    'require_issn': True,
+    'indicators': [
+        (int, 'total_cites'),
+        (float, 'journal_impact_factor'),
+        (float, 'impact_factor_without_journal_self_cites'),
+        (float, 'five_year_impact_factor'),
+        (float, 'immediacy_index'),
+        (int, 'citable_items'),
+        (str, 'cited_half_life'),
+        (str, 'citing_half_life'),
+        (float, 'eigenfactor_score'),
+        (float, 'article_influence_score'),
+        (float, 'percentage_articles_in_citable_items'),
+        (float, 'average_journal_impact_factor_percentile'),
+        (float, 'normalized_eigenfactor')],
+    'convert': jcr_convert,
+    'keys': ['issn_list', 'lower_title'],
+    'list_fields': ['citation_database'],
+    # the year of the first edition read (SCIE before SSCI)
+    'first_year': True}
+
+
+# the empty keys of the rows are removed, as in the other sources
+WOS = {
+    'model': 'Wos',
+    'file_name': 'data/wos/ESIMasterJournalList-022018.xlsx',
+    'title': 'full_title',
+    'issn': ['issn', 'eissn']}
+
+
+def oecd_prepare(rec):
+    # Key correction
+    rec = {k.lower(): v for k, v in rec.items()}
+
+    rec['oecd'] = [{
+        'code': rec['description'].split(' ', 1)[0],
+        'description': rec['description'].split(' ', 1)[1]}]
+
+    del rec['description']
+
+    return rec
+
+
+OECD = {
+    'model': 'Oecd',
+    'file_name': 'data/oecd/oecd_category_mapping_2012.xlsx',
+    'prepare': oecd_prepare,
+    'keys': ['wos_description'],
+    'list_fields': ['oecd'],
+    'journals': False}
@@ -2,11 +2,15 @@
 '''
 This script reads data from various sources to process and store in MongoDB.
 '''
-import pyexcel
+from sheet_reader import read_rows
 import logging
-import json
+import collections
 
 import models
+import bloom
+import staging
+import manifest
+from completeness import field_count
 from accent_remover import *
 
 
@@ -14,62 +18,58 @@ logging.basicConfig(filename='logs/wos_indexes.info.txt', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def indexes(filename):
-    sheet = pyexcel.get_sheet(
-        file_name=filename,
-        sheet_name='import',
-        name_columns_by_row=0)
-
-    sheet_json = sheet.to_records()
-
-    models.Wosindexes.drop_collection()
+def journals(sheet_json):
+    '''
+    Yield one journal by ISSN with the indexes of all its rows.
+    '''
+    docs = collections.OrderedDict()
 
     for rec in sheet_json:
 
-        print(rec['issn'])
-
-        query = models.Wosindexes.objects.filter(issn_list=rec['issn'])
+        if rec['issn'] in docs:
+            # index of another row of the journal, once
+            if rec['index'] not in docs[rec['issn']]['indexes']:
+                docs[rec['issn']]['indexes'].append(rec['index'])
+            continue
 
-        if len(query) == 0:
+        rec['issn_list'] = [rec['issn']]
 
-            rec['issn_list'] = []
+        rec['indexes'] = [rec['index']]
 
-            rec['issn_list'].append(rec['issn'])
+        rec['title_key'] = title_key(rec['title'])
 
-            rec['indexes'] = []
+        if any(rec['index'] == i for i in ['scie', 'ssci', 'ahci']):
+            rec['is_wos'] = 1
+        else:
+            rec['is_wos'] = 0
 
-            # rec['country'] = 'Brazil'
-            # rec['title_country'] = '%s-%s' % (
-            #     accent_remover(rec['title']).lower().replace(' & ', ' and ').replace('&', ' and '),
-            #     'brazil')
+        del rec['index']
 
-            if any(rec['index'] == i for i in ['scie', 'ssci', 'ahci']):
-                rec['is_wos'] = 1
-            else:
-                rec['is_wos'] = 0
+        rec['field_count'] = field_count(rec)
 
-            rec['indexes'].append(rec['index'])
+        docs[rec['issn']] = rec
 
-            del rec['index']
+    for doc in docs.values():
+        yield doc
 
-            mdata = models.Wosindexes(**rec)
-            mdata.save()
 
-        else:
-            if len(query) == 1:
-                print('ja existe\n')
+def indexes(filename, batch_size=1000, force=False):
+    return manifest.run_load(
+        models.Wosindexes, lambda: load_indexes(filename, batch_size), [filename],
+        force=force)
 
-                print(rec['issn'])
 
-                doc = query[0]
+def load_indexes(filename, batch_size=1000):
+    sheet_json = read_rows(filename, sheet_name='import')
 
-                data = {'indexes': []}
+    stage = staging.collection(models.Wosindexes)
+    count = staging.insert(
+        models.Wosindexes, stage, journals(sheet_json), batch_size)
+    staging.swap(models.Wosindexes, stage, count)
 
-                data['indexes'] = json.loads(query[0].to_json())['indexes']
-                data['indexes'].append(rec['index'])
+    bloom.build(models.Wosindexes)
 
-                if data:
-                    doc.update(**data)
+    return count
 
 
 def main():